@@ -0,0 +1,137 @@
+import re
+from typing import Literal
+
+from django.conf import settings
+from django.db import connection
+from munigeo.models import Address, Street
+
+from areas.digitransit import (
+    NUM_OF_RESULTS,
+    digitransit_address_search,
+    normalize_query,
+)
+
+ADDRESS_SEARCH_BACKEND_DIGITRANSIT = "digitransit"
+ADDRESS_SEARCH_BACKEND_LOCAL = "local"
+
+# Language whose street names are searched in addition to the requested language,
+# because most streets do not have names in every language
+FALLBACK_LANGUAGE = "fi"
+
+# Splits e.g. "lumikintie 4 b" into the street name, house number and letter
+QUERY_RE = re.compile(
+    r"^(?P<street>.*?)(?:\s+(?P<number>\d+)\s*(?P<letter>[a-zåäö])?)?$"
+)
+
+StreetTranslation = Street._meta.get_field("translations").related_model
+
+LOCAL_ADDRESS_SEARCH_SQL = """
+    SELECT
+        address.id,
+        street_translation.name,
+        address.number,
+        address.number_end,
+        address.letter,
+        ST_X(ST_Transform(address.location, 4326)),
+        ST_Y(ST_Transform(address.location, 4326))
+    FROM {street_translation_table} AS street_translation
+    JOIN {address_table} AS address ON address.street_id = street_translation.master_id
+    WHERE
+        street_translation.language_code = ANY(%(languages)s)
+        AND (
+            lower(street_translation.name) LIKE %(prefix)s
+            OR lower(street_translation.name) %% %(street)s::text
+        )
+        AND (%(number)s::text = '' OR address.number = %(number)s)
+        AND (%(letter)s::text = '' OR lower(address.letter) = %(letter)s)
+    ORDER BY
+        lower(street_translation.name) LIKE %(prefix)s DESC,
+        similarity(lower(street_translation.name), %(street)s::text) DESC,
+        street_translation.language_code = %(language)s DESC,
+        street_translation.name,
+        length(address.number),
+        address.number,
+        address.letter
+    LIMIT %(limit)s
+"""
+
+
+def address_search(text: str, language: Literal["fi", "sv", "en"] = "fi") -> dict:
+    """
+    Search addresses using the backend selected by the ADDRESS_SEARCH_BACKEND setting
+
+    When the local backend is used and it does not find anything, e.g. because
+    addresses have not been imported, the search falls back to Digitransit.
+    """
+    if settings.ADDRESS_SEARCH_BACKEND == ADDRESS_SEARCH_BACKEND_LOCAL:
+        response = local_address_search(text, language)
+        if response["features"]:
+            return response
+
+    return digitransit_address_search(text, language)
+
+
+def local_address_search(text: str, language: Literal["fi", "sv", "en"] = "fi") -> dict:
+    """
+    Search addresses from the imported munigeo addresses
+
+    The street name is matched by prefix or by trigram similarity, both of which use
+    the trigram index on the street names, and the optional house number and letter
+    exactly. The response has the same shape as the one of
+    digitransit_address_search().
+    """
+    match = QUERY_RE.match(normalize_query(text))
+    street = match["street"]
+    if not street:
+        return {"type": "FeatureCollection", "features": []}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            LOCAL_ADDRESS_SEARCH_SQL.format(
+                street_translation_table=StreetTranslation._meta.db_table,
+                address_table=Address._meta.db_table,
+            ),
+            {
+                "languages": list({language, FALLBACK_LANGUAGE}),
+                "language": language,
+                "prefix": _escape_like(street) + "%",
+                "street": street,
+                "number": match["number"] or "",
+                "letter": match["letter"] or "",
+                # the same address can match with names in several languages
+                "limit": NUM_OF_RESULTS * 2,
+            },
+        )
+        rows = cursor.fetchall()
+
+    features = []
+    found_ids = set()
+    for pk, street_name, number, number_end, letter, lon, lat in rows:
+        if pk in found_ids:
+            continue
+        found_ids.add(pk)
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [round(lon, 6), round(lat, 6)],
+                },
+                "properties": {
+                    "name": _get_address_name(street_name, number, number_end, letter),
+                },
+            }
+        )
+
+    return {"type": "FeatureCollection", "features": features[:NUM_OF_RESULTS]}
+
+
+def _get_address_name(street_name, number, number_end, letter):
+    name = f"{street_name} {number}" if number else street_name
+    if number_end:
+        name += f"-{number_end}"
+    return name + letter
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
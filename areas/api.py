@@ -1,18 +1,37 @@
+import csv
+import hashlib
+import json
+from copy import copy
+from math import cos, radians
+
 from django.conf import settings
-from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.db.models.functions import Distance, GeometryDistance
 from django.contrib.gis.geos import Point
-from django.db.models import Count, Q, Sum
+from django.contrib.gis.measure import D
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import OuterRef, Subquery, Sum
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
 from django_filters import rest_framework as filters
 from munigeo.models import Address, Street
 from parler_rest.fields import TranslatedFieldsField
 from parler_rest.serializers import TranslatableModelSerializer
-from rest_framework import serializers, viewsets
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
-from areas.digitransit import digitransit_address_search
-from areas.models import ContractZone
-from common.api import UTCModelSerializer
-from events.models import Event
+from areas.address_search import address_search
+from areas.models import (
+    SIMPLIFIED_BOUNDARY_ZOOM_LEVELS,
+    ContractZone,
+    ContractZoneStatistics,
+)
+from areas.spatial_index import contract_zone_index, get_contract_zone_index_version
+from common.api import CSVRenderer, Echo, UTCModelSerializer
+from common.utils import get_today
+from events.permissions import IsOfficial, IsSuperUser
 from users.models import can_view_contract_zone_details
 
 
@@ -40,11 +59,69 @@ class TranslatedModelSerializer(TranslatableModelSerializer, UTCModelSerializer)
         return ret
 
 
+GEO_QUERY_BATCH_MAX_POINTS = 100
+
+# Radius (in meters) inside which the closest address is first searched for, and the
+# number of nearest addresses by the KNN operator from which the closest one by actual
+# distance is picked when there are no addresses inside the radius.
+CLOSEST_ADDRESS_SEARCH_RADIUS = 500
+CLOSEST_ADDRESS_CANDIDATE_COUNT = 10
+METERS_PER_DEGREE = 111_320
+
+CONTRACT_ZONE_STATISTICS_MAX_YEARS = 20
+STATISTICS_VALUE_FIELDS = (
+    "event_count",
+    "estimated_attendee_count",
+    "small_trash_bag_count",
+    "large_trash_bag_count",
+    "trash_picker_count",
+)
+
+
 class GeoQueryParamSerializer(serializers.Serializer):
     lat = serializers.FloatField(required=True)
     lon = serializers.FloatField(required=True)
 
 
+class GeoQueryBatchParamSerializer(serializers.Serializer):
+    """
+    Accepts either a list of points {"points": [{"lat": ..., "lon": ...}, ...]} or a
+    GeoJSON MultiPoint {"type": "MultiPoint", "coordinates": [[lon, lat], ...]}.
+    """
+
+    points = GeoQueryParamSerializer(many=True, required=False)
+    type = serializers.ChoiceField(choices=["MultiPoint"], required=False)
+    coordinates = serializers.ListField(
+        child=serializers.ListField(
+            child=serializers.FloatField(), min_length=2, max_length=2
+        ),
+        required=False,
+    )
+
+    def validate(self, data):
+        if "points" in data:
+            coordinates = [(point["lon"], point["lat"]) for point in data["points"]]
+        elif data.get("type") == "MultiPoint" and "coordinates" in data:
+            coordinates = data["coordinates"]
+        else:
+            raise serializers.ValidationError(
+                _("Either points or a GeoJSON MultiPoint is required.")
+            )
+
+        if not 0 < len(coordinates) <= GEO_QUERY_BATCH_MAX_POINTS:
+            raise serializers.ValidationError(
+                _("The number of points must be between 1 and {max}.").format(
+                    max=GEO_QUERY_BATCH_MAX_POINTS
+                )
+            )
+
+        return {
+            "points": [
+                Point(lon, lat, srid=settings.DEFAULT_SRID) for lon, lat in coordinates
+            ]
+        }
+
+
 class StreetSerializer(TranslatedModelSerializer):
     class Meta:
         model = Street
@@ -84,9 +161,36 @@ class GeoQueryViewSet(viewsets.ViewSet):
             srid=settings.DEFAULT_SRID,
         )
         address = self.get_closest_address(point)
-        contract_zone = ContractZone.objects.get_active_by_location(point)
+        contract_zone = contract_zone_index.get_active_by_location(point)
+
+        return Response(self.get_result_data(address, contract_zone))
+
+    @action(detail=False, methods=["post"])
+    def batch(self, request, format=None):
+        """
+        Resolve the closest address and the contract zone of several points at once
+
+        The results are returned in the same order as the points were given.
+        """
+        param_serializer = GeoQueryBatchParamSerializer(data=request.data)
+        param_serializer.is_valid(raise_exception=True)
 
-        data = {
+        points = param_serializer.validated_data["points"]
+        addresses = self.get_closest_addresses(points)
+        contract_zones = contract_zone_index.get_active_by_locations(points)
+
+        return Response(
+            {
+                "results": [
+                    self.get_result_data(address, contract_zone)
+                    for address, contract_zone in zip(addresses, contract_zones)
+                ]
+            }
+        )
+
+    @classmethod
+    def get_result_data(cls, address, contract_zone):
+        return {
             "closest_address": AddressSerializer(address).data if address else None,
             "contract_zone": (
                 ContractZoneSerializerGeoQueryView(contract_zone).data
@@ -95,15 +199,108 @@ class GeoQueryViewSet(viewsets.ViewSet):
             ),
         }
 
-        return Response(data)
-
     @classmethod
     def get_closest_address(cls, point):
-        return (
-            Address.objects.annotate(distance=Distance("location", point))
+        """
+        Return the address closest to the given point
+
+        Addresses inside CLOSEST_ADDRESS_SEARCH_RADIUS are searched for first using
+        the spatial index. If the closest one of those is not guaranteed to be the
+        closest address overall, CLOSEST_ADDRESS_CANDIDATE_COUNT nearest addresses
+        are fetched using the KNN distance operator instead, and the closest one of
+        them by actual distance is returned.
+        """
+        addresses = Address.objects.annotate(distance=Distance("location", point))
+
+        address = (
+            addresses.filter(location__dwithin=(point, cls._get_search_radius(point)))
             .order_by("distance")
             .first()
         )
+        if address and address.distance.m <= CLOSEST_ADDRESS_SEARCH_RADIUS:
+            return address
+
+        candidates = addresses.order_by(GeometryDistance("location", point))[
+            :CLOSEST_ADDRESS_CANDIDATE_COUNT
+        ]
+        return min(candidates, key=lambda a: a.distance.m, default=None)
+
+    @classmethod
+    def _get_search_radius(cls, point):
+        if not Address._meta.get_field("location").geodetic(connection):
+            return D(m=CLOSEST_ADDRESS_SEARCH_RADIUS)
+
+        # Geodetic fields need the radius in degrees. Use the length of a degree of
+        # longitude, which is the shorter one, so that the radius covers at least
+        # CLOSEST_ADDRESS_SEARCH_RADIUS meters in every direction.
+        return CLOSEST_ADDRESS_SEARCH_RADIUS / (
+            METERS_PER_DEGREE * cos(radians(point.y))
+        )
+
+    @classmethod
+    def get_closest_addresses(cls, points):
+        """
+        Return a list containing the closest address or None for every given point
+
+        Uses a LATERAL subquery ordered by the KNN distance operator so that all the
+        points are resolved using the spatial index in a single query. The closest
+        one of the CLOSEST_ADDRESS_CANDIDATE_COUNT nearest addresses by actual
+        distance is picked for every point.
+        """
+        location_field = Address._meta.get_field("location")
+        distance_function = (
+            "ST_DistanceSphere"
+            if location_field.geodetic(connection)
+            else "ST_Distance"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT point.idx, address.id, address.distance
+                FROM unnest(%s::float8[], %s::float8[])
+                    WITH ORDINALITY AS point(x, y, idx)
+                CROSS JOIN LATERAL ST_Transform(
+                    ST_SetSRID(ST_MakePoint(point.x, point.y), %s), %s
+                ) AS point_geom
+                CROSS JOIN LATERAL (
+                    SELECT id, distance
+                    FROM (
+                        SELECT
+                            id,
+                            {distance_function}(location, point_geom) AS distance
+                        FROM {Address._meta.db_table}
+                        ORDER BY location <-> point_geom
+                        LIMIT %s
+                    ) AS candidate
+                    ORDER BY distance
+                    LIMIT 1
+                ) AS address
+                """,
+                (
+                    [point.x for point in points],
+                    [point.y for point in points],
+                    points[0].srid,
+                    location_field.srid,
+                    CLOSEST_ADDRESS_CANDIDATE_COUNT,
+                ),
+            )
+            rows = {idx: (pk, distance) for idx, pk, distance in cursor.fetchall()}
+
+        addresses = (
+            Address.objects.select_related("street")
+            .prefetch_related("street__translations")
+            .in_bulk({pk for pk, _distance in rows.values()})
+        )
+        result = []
+        for idx in range(1, len(points) + 1):
+            address = None
+            if idx in rows:
+                pk, distance = rows[idx]
+                address = copy(addresses[pk])
+                address.distance = D(m=distance)
+            result.append(address)
+        return result
 
 
 class ContractZoneSerializer(ContractZoneSerializerBase):
@@ -142,24 +339,207 @@ class ContractZoneFilter(filters.FilterSet):
 
     def filter_stats(self, queryset, name, value):
         if can_view_contract_zone_details(self.request.user):
-            filtering = Q(
-                events__start_time__date__year=value, events__state=Event.APPROVED
-            )
+            # the stats are read from the precalculated monthly rollup, see
+            # events.statistics
+            statistics = ContractZoneStatistics.objects.filter(
+                contract_zone=OuterRef("pk"), year=value
+            ).values("contract_zone")
             queryset = queryset.order_by("id").annotate(
-                event_count=Count("events", filter=filtering),
-                estimated_attendee_count=Sum(
-                    "events__estimated_attendee_count", filter=filtering
+                event_count=Subquery(
+                    statistics.annotate(total=Sum("event_count")).values("total")
+                ),
+                estimated_attendee_count=Subquery(
+                    statistics.annotate(total=Sum("estimated_attendee_count")).values(
+                        "total"
+                    )
                 ),
             )
 
         return queryset
 
 
+class ContractZoneBoundariesParamSerializer(serializers.Serializer):
+    zoom = serializers.IntegerField(
+        min_value=0, max_value=24, default=max(SIMPLIFIED_BOUNDARY_ZOOM_LEVELS)
+    )
+
+
 class ContractZoneViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ContractZone.objects.all()
     serializer_class = ContractZoneSerializer
     filterset_class = ContractZoneFilter
 
+    @action(detail=False)
+    def boundaries(self, request, format=None):
+        """
+        Return the boundaries of active contract zones as a GeoJSON FeatureCollection
+
+        The boundaries are simplified for the nearest precomputed zoom level not
+        greater than the requested one. Responses are cached until contract zones
+        change, and an ETag is included so that clients can revalidate cheaply.
+        """
+        param_serializer = ContractZoneBoundariesParamSerializer(
+            data=request.query_params
+        )
+        param_serializer.is_valid(raise_exception=True)
+        requested_zoom = param_serializer.validated_data["zoom"]
+        zoom = max(
+            (z for z in SIMPLIFIED_BOUNDARY_ZOOM_LEVELS if z <= requested_zoom),
+            default=min(SIMPLIFIED_BOUNDARY_ZOOM_LEVELS),
+        )
+
+        cache_key = (
+            f"contract_zone_boundaries:{get_contract_zone_index_version()}:{zoom}"
+        )
+        cached = cache.get(cache_key)
+        if cached is None:
+            data = self._get_boundaries_data(zoom)
+            content_hash = hashlib.sha256(json.dumps(data, sort_keys=True).encode())
+            cached = (f'"{content_hash.hexdigest()}"', data)
+            cache.set(cache_key, cached)
+        etag, data = cached
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response["ETag"] = etag
+        return response
+
+    @classmethod
+    def _get_boundaries_data(cls, zoom):
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {
+                    "type": "Feature",
+                    "id": contract_zone.id,
+                    "geometry": contract_zone.get_simplified_boundary(zoom),
+                    "properties": {"id": contract_zone.id, "name": contract_zone.name},
+                }
+                for contract_zone in ContractZone.objects.filter(active=True)
+            ],
+        }
+
+
+class ContractZoneStatisticsParamSerializer(serializers.Serializer):
+    start_year = serializers.IntegerField(min_value=2000, required=False)
+    end_year = serializers.IntegerField(min_value=2000, required=False)
+
+    def validate(self, data):
+        end_year = data.get("end_year", get_today().year)
+        start_year = data.get("start_year", end_year)
+        if start_year > end_year:
+            raise serializers.ValidationError(
+                _("start_year cannot be greater than end_year.")
+            )
+        if end_year - start_year >= CONTRACT_ZONE_STATISTICS_MAX_YEARS:
+            raise serializers.ValidationError(
+                _("At most %d years can be requested at a time.")
+                % CONTRACT_ZONE_STATISTICS_MAX_YEARS
+            )
+        return {"start_year": start_year, "end_year": end_year}
+
+
+class ContractZoneStatisticsViewSet(viewsets.ViewSet):
+    """
+    Monthly statistics of approved events per contract zone for a range of years
+
+    The statistics are read from the monthly rollup maintained in
+    ContractZoneStatistics with a single query, and the response is streamed either
+    as JSON or, with format=csv, as CSV with one row per contract zone and month.
+    Months without events are included with zero values.
+    """
+
+    permission_classes = [IsSuperUser | IsOfficial]
+    renderer_classes = [JSONRenderer, CSVRenderer]
+
+    def list(self, request, format=None):
+        param_serializer = ContractZoneStatisticsParamSerializer(
+            data=request.query_params
+        )
+        param_serializer.is_valid(raise_exception=True)
+        start_year = param_serializer.validated_data["start_year"]
+        end_year = param_serializer.validated_data["end_year"]
+
+        series = self._get_series(start_year, end_year)
+        if request.accepted_renderer.format == "csv":
+            content = self._get_csv_content(series)
+        else:
+            content = self._get_json_content(series, start_year, end_year)
+
+        return StreamingHttpResponse(
+            content,
+            content_type=f"{request.accepted_renderer.media_type}; charset=utf-8",
+        )
+
+    @staticmethod
+    def _get_series(start_year, end_year):
+        """
+        Yield (contract zone, list of monthly values) for every contract zone
+        """
+        rows = (
+            ContractZoneStatistics.objects.filter(year__range=(start_year, end_year))
+            .order_by()
+            .values_list("contract_zone_id", "year", "month", *STATISTICS_VALUE_FIELDS)
+        )
+        values_by_bucket = {
+            (contract_zone_id, year, month): dict(zip(STATISTICS_VALUE_FIELDS, values))
+            for contract_zone_id, year, month, *values in rows
+        }
+        empty_values = dict.fromkeys(STATISTICS_VALUE_FIELDS, 0)
+        months = [
+            (year, month)
+            for year in range(start_year, end_year + 1)
+            for month in range(1, 13)
+        ]
+
+        for contract_zone in ContractZone.objects.order_by("id").only("id", "name"):
+            yield (
+                contract_zone,
+                [
+                    {
+                        "year": year,
+                        "month": month,
+                        **values_by_bucket.get(
+                            (contract_zone.id, year, month), empty_values
+                        ),
+                    }
+                    for year, month in months
+                ],
+            )
+
+    @staticmethod
+    def _get_json_content(series, start_year, end_year):
+        yield f'{{"start_year":{start_year},"end_year":{end_year},"results":['
+        for idx, (contract_zone, monthly_values) in enumerate(series):
+            zone_data = {
+                "id": contract_zone.id,
+                "name": contract_zone.name,
+                "series": monthly_values,
+            }
+            yield ("," if idx else "") + json.dumps(zone_data, ensure_ascii=False)
+        yield "]}"
+
+    @staticmethod
+    def _get_csv_content(series):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ["contract_zone_id", "contract_zone_name", "year", "month"]
+            + list(STATISTICS_VALUE_FIELDS)
+        )
+        for contract_zone, monthly_values in series:
+            for values in monthly_values:
+                yield writer.writerow(
+                    [
+                        contract_zone.id,
+                        contract_zone.name,
+                        values["year"],
+                        values["month"],
+                    ]
+                    + [values[field] for field in STATISTICS_VALUE_FIELDS]
+                )
+
 
 class AddressSearchParamSerializer(serializers.Serializer):
     text = serializers.CharField(required=True)
@@ -173,6 +553,6 @@ class AddressSearchViewSet(viewsets.ViewSet):
 
         text = param_serializer.data["text"]
         language = param_serializer.data["language"]
-        data = digitransit_address_search(text, language)
+        data = address_search(text, language)
 
         return Response(data)
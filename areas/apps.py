@@ -5,3 +5,6 @@ from django.utils.translation import gettext_lazy as _
 class AreasConfig(AppConfig):
     name = "areas"
     verbose_name = _("Areas")
+
+    def ready(self):
+        import areas.receivers  # noqa
@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils.timezone import get_current_timezone_name
+
+from common.cache_versions import bump_cache_versions_on_commit, get_cache_version
+from common.utils import date_range, get_today, vacation_calendar
+
+GROUP_EVENT_COUNTS_SQL = """
+    SELECT groups.group_start, COUNT(DISTINCT event.id)
+    FROM ({events_sql}) AS event
+    CROSS JOIN LATERAL generate_series(
+        (event.start_time AT TIME ZONE %s)::date,
+        (event.end_time AT TIME ZONE %s)::date,
+        interval '1 day'
+    ) AS event_day(day)
+    JOIN unnest(%s::date[], %s::date[]) AS groups(day, group_start)
+        ON groups.day = event_day.day::date
+    GROUP BY groups.group_start
+"""
+
+UNAVAILABLE_DATES_CACHE_TIMEOUT = 60 * 60 * 24  # secs
+
+
+def get_availability_horizon():
+    """
+    Return the last date for which availability needs to be calculated
+
+    Events cannot be created to start later than EVENT_MAXIMUM_DAYS_TO_START days from
+    now, so there is no need to look further than that plus the maximum event length.
+    """
+    return get_today() + timedelta(
+        days=settings.EVENT_MAXIMUM_DAYS_TO_START + settings.EVENT_MAXIMUM_DAYS_LENGTH
+    )
+
+
+def get_group_starts(first_day, last_day):
+    """
+    Return a set of the first dates of the vacation day groups of the given range
+
+    See areas.models.get_affected_dates for a description of the groups.
+    """
+    return {
+        vacation_calendar.get_group(date)[0] for date in date_range(first_day, last_day)
+    }
+
+
+def get_group_event_counts(events, first_day, last_day):
+    """
+    Return a dict mapping the first date of every vacation day group between first_day
+    and last_day that has events to the number of those events
+
+    The per group event counts are calculated by the database in a single aggregated
+    query, so the cost of this is not affected by the amount of events in Python. Only
+    the days from first_day onwards are taken into account, so for complete counts
+    first_day should be the first date of a group.
+
+    :param events: Event queryset containing the events to be taken into account.
+    :param first_day: First date to count.
+    :param last_day: Last date to count.
+    """
+    days, group_starts = _get_range_groups(first_day, last_day)
+
+    events_sql, events_params = (
+        events.order_by().values("id", "start_time", "end_time").query.sql_with_params()
+    )
+    time_zone = get_current_timezone_name()
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            GROUP_EVENT_COUNTS_SQL.format(events_sql=events_sql),
+            (*events_params, time_zone, time_zone, days, group_starts),
+        )
+        return dict(cursor.fetchall())
+
+
+def get_full_dates(day_loads, first_day, last_day, exclude_event_dates=None):
+    """
+    Return a set of dates from first_day onwards whose vacation day group already has
+    the maximum number of events
+
+    The groups are read from the precomputed ZoneDayLoad rows with a single range
+    query, and the dates of every full group up to its end are returned.
+
+    :param day_loads: ZoneDayLoad queryset of the contract zone.
+    :param first_day: First date to check.
+    :param last_day: Last date to check.
+    :param exclude_event_dates: Local start and end date of an event that should not
+        be counted, e.g. the one being modified.
+    """
+    max_count = settings.EVENT_MAXIMUM_COUNT_PER_CONTRACT_ZONE
+    excluded_groups = (
+        get_group_starts(*exclude_event_dates) if exclude_event_dates else set()
+    )
+    rows = day_loads.filter(
+        date__range=(vacation_calendar.get_group(first_day)[0], last_day),
+        event_count__gte=max_count,
+    ).values_list("date", "event_count")
+
+    full_dates = set()
+    for group_start, event_count in rows:
+        if group_start in excluded_groups:
+            event_count -= 1
+        if event_count >= max_count:
+            group_end = vacation_calendar.get_group(group_start)[1]
+            full_dates.update(date_range(max(group_start, first_day), group_end))
+
+    return full_dates
+
+
+def lock_vacation_day_groups(ranges):
+    """
+    Lock the vacation day groups of the given contract zone date ranges until the end
+    of the current transaction
+
+    Transaction level advisory locks keyed by the zone and the first date of the group
+    are used, so only changes touching the same groups of the same zone wait for each
+    other. All the groups are locked at once in zone and date order to avoid
+    deadlocks, so everything a transaction needs should be locked with a single call.
+
+    :param ranges: Iterable of (contract zone ID, first date, last date) tuples.
+    """
+    keys = sorted(
+        {
+            (contract_zone_id, group_start.toordinal())
+            for contract_zone_id, first_day, last_day in ranges
+            for group_start in get_group_starts(first_day, last_day)
+        }
+    )
+    with connection.cursor() as cursor:
+        for key in keys:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", key)
+
+
+def get_cached_unavailable_dates(contract_zone_id, calculate):
+    """
+    Return the zone's unavailable dates from the cache, or calculate and cache them
+
+    The cache key contains the current local date, so cached values are never used
+    after midnight, and the zone's version from the database, which is changed by
+    invalidate_unavailable_dates() when the zone's events or blocked dates change.
+
+    :param contract_zone_id: ID of the contract zone.
+    :param calculate: Function that calculates the unavailable dates.
+    """
+    version = get_cache_version(_get_version_key(contract_zone_id))
+    key = f"unavailable_dates:{contract_zone_id}:{version}:{get_today().isoformat()}"
+
+    unavailable_dates = cache.get(key)
+    if unavailable_dates is None:
+        unavailable_dates = calculate()
+        cache.set(key, unavailable_dates, UNAVAILABLE_DATES_CACHE_TIMEOUT)
+
+    return unavailable_dates
+
+
+def invalidate_unavailable_dates(*contract_zone_ids):
+    """
+    Invalidate the cached unavailable dates of the given contract zones
+
+    The zones' versions are changed right after the current transaction has been
+    committed, so every process stops using the cached values. The version rows are
+    not locked in the transaction itself, so that bookings touching different vacation
+    day groups of the same zone do not wait for each other. Bookings recheck
+    availability without the cache, so the cached values can lag behind briefly.
+    """
+    bump_cache_versions_on_commit(
+        *(_get_version_key(pk) for pk in contract_zone_ids if pk)
+    )
+
+
+def _get_range_groups(first_day, last_day):
+    last_day = vacation_calendar.get_group(last_day)[1]
+    return vacation_calendar.get_range_groups(first_day, last_day)
+
+
+def _get_version_key(contract_zone_id):
+    return f"unavailable_dates_version:{contract_zone_id}"
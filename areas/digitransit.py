@@ -1,7 +1,17 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
 from typing import Literal
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
 
 DIGITRANSIT_API_KEY_HEADER = "digitransit-subscription-key"
 
@@ -10,49 +20,257 @@ BOUNDARY_MAX_LAT = "60.3"
 BOUNDARY_MIN_LON = "24.73"
 BOUNDARY_MAX_LON = "25.33"
 NUM_OF_RESULTS = 5
-REQUEST_TIMEOUT = 10  # secs
+
+# Maximum number of kept-alive connections per process. Each uWSGI thread needs at most
+# one at a time.
+CONNECTION_POOL_SIZE = 4
+
+# The circuit is opened after this many consecutive failed requests, and a single
+# trial request is let through after it has been open for the reset timeout
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_TIMEOUT = 30  # secs
+
+# Upper bounds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # secs
+
+# How often the metrics of the process are logged at most
+METRICS_LOG_INTERVAL = 60 * 5  # secs
+
+# How long cached search results are used as such, how long searches without results
+# are cached, and how long stale results are kept for serving while refreshing them or
+# when Digitransit is not available
+CACHE_FRESH_TIME = 60 * 60 * 24  # secs
+CACHE_EMPTY_FRESH_TIME = 60 * 60  # secs
+CACHE_STALE_TIME = 60 * 60 * 24 * 7  # secs
+CACHE_REFRESH_LOCK_TIMEOUT = 30  # secs
 
 
 class DigitransitApiError(Exception):
     pass
 
 
+class DigitransitClient:
+    """
+    Client for the Digitransit geocoding API
+
+    Requests are made through a session with a pool of kept-alive connections, using
+    separate connect and read timeouts from the settings. A circuit breaker makes
+    requests fail fast without contacting Digitransit after repeated failures, so that
+    a slow or failing upstream does not tie up the few worker threads we have.
+
+    Latency, failure and circuit state metrics of the process are available from
+    get_metrics(), and they are logged every METRICS_LOG_INTERVAL seconds when the
+    client is used.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self):
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=CONNECTION_POOL_SIZE, max_retries=0
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failure_count = 0
+        self._opened_at = None
+        self._latency_bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._latency_sum = 0.0
+        self._request_count = 0
+        self._failed_request_count = 0
+        self._rejected_request_count = 0
+        self._metrics_logged_at = time.monotonic()
+
+    def address_search(self, text, language):
+        try:
+            self._before_request()
+
+            start = time.perf_counter()
+            try:
+                response = self._address_search(text, language)
+            except Exception:
+                # any error counts as a failure, so that a trial request always
+                # either closes the circuit or opens it again
+                self._after_request(time.perf_counter() - start, succeeded=False)
+                raise
+            self._after_request(time.perf_counter() - start, succeeded=True)
+        finally:
+            self._log_metrics_if_due()
+
+        return response
+
+    def get_metrics(self):
+        with self._lock:
+            cumulative_count = 0
+            latency_buckets = {}
+            for bound, count in zip(
+                (*LATENCY_BUCKETS, "+Inf"), self._latency_bucket_counts
+            ):
+                cumulative_count += count
+                latency_buckets[str(bound)] = cumulative_count
+
+            return {
+                "circuit_state": self._state,
+                "consecutive_failure_count": self._failure_count,
+                "request_count": self._request_count,
+                "failed_request_count": self._failed_request_count,
+                "rejected_request_count": self._rejected_request_count,
+                "latency_seconds": {
+                    "buckets": latency_buckets,
+                    "sum": self._latency_sum,
+                    "count": self._request_count,
+                },
+            }
+
+    def _log_metrics_if_due(self):
+        with self._lock:
+            current_time = time.monotonic()
+            if current_time - self._metrics_logged_at < METRICS_LOG_INTERVAL:
+                return
+            self._metrics_logged_at = current_time
+
+        logger.info(f"Digitransit API client metrics {json.dumps(self.get_metrics())}")
+
+    def _before_request(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if (
+                self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= CIRCUIT_BREAKER_RESET_TIMEOUT
+            ):
+                # let this request through to see whether Digitransit has recovered
+                self._state = self.HALF_OPEN
+                return
+
+            self._rejected_request_count += 1
+        raise DigitransitApiError("Digitransit API circuit breaker is open")
+
+    def _after_request(self, duration, succeeded):
+        with self._lock:
+            self._request_count += 1
+            self._latency_sum += duration
+            self._latency_bucket_counts[bisect_left(LATENCY_BUCKETS, duration)] += 1
+
+            if succeeded:
+                if self._state != self.CLOSED:
+                    logger.info("Digitransit API circuit breaker closed")
+                self._state = self.CLOSED
+                self._failure_count = 0
+                return
+
+            self._failed_request_count += 1
+            self._failure_count += 1
+            if self._state == self.HALF_OPEN or (
+                self._failure_count >= CIRCUIT_BREAKER_FAILURE_THRESHOLD
+            ):
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Digitransit API circuit breaker opened after "
+                        f"{self._failure_count} consecutive failure(s)"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def _address_search(self, text, language):
+        try:
+            digitransit_response = self._session.get(
+                settings.DIGITRANSIT_ADDRESS_SEARCH_URL,
+                params={
+                    "text": text,
+                    "lang": language,
+                    "boundary.rect.min_lat": BOUNDARY_MIN_LAT,
+                    "boundary.rect.max_lat": BOUNDARY_MAX_LAT,
+                    "boundary.rect.min_lon": BOUNDARY_MIN_LON,
+                    "boundary.rect.max_lon": BOUNDARY_MAX_LON,
+                    "size": NUM_OF_RESULTS,
+                    "layers": "address",
+                },
+                headers={DIGITRANSIT_API_KEY_HEADER: settings.DIGITRANSIT_API_KEY},
+                timeout=(
+                    settings.DIGITRANSIT_CONNECT_TIMEOUT,
+                    settings.DIGITRANSIT_READ_TIMEOUT,
+                ),
+            )
+            digitransit_response.raise_for_status()
+            digitransit_response_json = digitransit_response.json()
+
+            response = {
+                "type": digitransit_response_json["type"],
+                "features": [
+                    {
+                        "type": feature["type"],
+                        "geometry": feature["geometry"],
+                        "properties": {
+                            "name": feature["properties"]["name"],
+                        },
+                    }
+                    for feature in digitransit_response_json["features"]
+                ],
+            }
+        except (
+            requests.exceptions.RequestException,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as e:
+            raise DigitransitApiError("Digitransit API request failed:", e) from e
+
+        return response
+
+
+digitransit_client = DigitransitClient()
+
+
 def digitransit_address_search(
     text: str, language: Literal["fi", "sv", "en"] = "fi"
 ) -> dict:
-    try:
-        digitransit_response = requests.get(
-            settings.DIGITRANSIT_ADDRESS_SEARCH_URL,
-            params={
-                "text": text,
-                "lang": language,
-                "boundary.rect.min_lat": BOUNDARY_MIN_LAT,
-                "boundary.rect.max_lat": BOUNDARY_MAX_LAT,
-                "boundary.rect.min_lon": BOUNDARY_MIN_LON,
-                "boundary.rect.max_lon": BOUNDARY_MAX_LON,
-                "size": NUM_OF_RESULTS,
-                "layers": "address",
-            },
-            headers={"digitransit-subscription-key": settings.DIGITRANSIT_API_KEY},
-            timeout=REQUEST_TIMEOUT,
-        )
-        digitransit_response.raise_for_status()
-        digitransit_response_json = digitransit_response.json()
-
-        response = {
-            "type": digitransit_response_json["type"],
-            "features": [
-                {
-                    "type": feature["type"],
-                    "geometry": feature["geometry"],
-                    "properties": {
-                        "name": feature["properties"]["name"],
-                    },
-                }
-                for feature in digitransit_response_json["features"]
-            ],
-        }
-    except (requests.exceptions.RequestException, KeyError) as e:
-        raise DigitransitApiError("Digitransit API request failed:", e) from e
+    """
+    Search addresses from Digitransit, using cached results when possible
+
+    Queries are normalized by lower-casing and collapsing whitespace, so that trivially
+    different queries share results. Searches without results are cached for a
+    shorter time. After a result has become stale, only one request at a time
+    refreshes it from Digitransit, others get the stale result meanwhile, and the
+    stale result is also used if the refresh fails.
+    """
+    text = normalize_query(text)
+    key = _get_cache_key(text, language)
+
+    cached = cache.get(key)
+    if cached is not None:
+        fresh_until, response = cached
+        if time.time() < fresh_until:
+            return response
+        if not cache.add(f"{key}:refresh", True, CACHE_REFRESH_LOCK_TIMEOUT):
+            return response
+        try:
+            return _search_and_cache(key, text, language)
+        except DigitransitApiError as e:
+            logger.warning(f"Using a stale address search result, {e}")
+            return response
+        finally:
+            cache.delete(f"{key}:refresh")
+
+    return _search_and_cache(key, text, language)
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _get_cache_key(text, language):
+    text_hash = hashlib.sha256(text.encode()).hexdigest()
+    return f"digitransit_address_search:{language}:{text_hash}"
+
 
+def _search_and_cache(key, text, language):
+    response = digitransit_client.address_search(text, language)
+    fresh_time = CACHE_FRESH_TIME if response["features"] else CACHE_EMPTY_FRESH_TIME
+    cache.set(key, (time.time() + fresh_time, response), CACHE_STALE_TIME)
     return response
@@ -1,29 +1,73 @@
+import hashlib
+import json
 import logging
-import urllib
 
 from django.conf import settings
-from django.contrib.gis.gdal import DataSource
-from django.contrib.gis.gdal.feature import Feature
+from django.contrib.gis.geos import GEOSGeometry, MultiPolygon, Polygon
 from django.db import transaction
 
-from areas.models import ContractZone
+from areas.models import ContractZone, ImportSourceState
+from areas.spatial_index import bump_contract_zone_index_version
 from haravajarjestelma.settings import EXCLUDED_CONTRACT_ZONES
 
 from .utils import ModelSyncher
+from .wfs import WFSFeatureFetcher, iter_geojson_file_features
 
 logger = logging.getLogger(__name__)
 
+WFS_SOURCE = "helsinki_contract_zones"
+
+IMPORTED_FIELDS = (
+    "name",
+    "boundary",
+    "contractor",
+    "contact_person",
+    "email",
+    "phone",
+    "secondary_contact_person",
+    "secondary_email",
+    "secondary_phone",
+    "origin_id",
+)
+
 
 class HelsinkiImporter:
-    def import_contract_zones(self, force=False):
+    def import_contract_zones(self, force=False, file_path=None):
+        """
+        Import contract zones from the Helsinki WFS, or from a local GeoJSON file
+
+        When importing from the WFS, nothing is done if the data has not changed since
+        the previous import. Returns the counts of created, updated, unchanged and
+        deactivated contract zones, or None if the import was skipped.
+        """
         logger.info("Importing Helsinki contract zones")
 
-        data_source = self._fetch_contract_zones()
-        self._process_contract_zones(data_source, force)
-
-        logger.info("Helsinki contract zone import done!")
+        if file_path:
+            fetcher = None
+            features = iter_geojson_file_features(file_path)
+        else:
+            state, _created = ImportSourceState.objects.get_or_create(source=WFS_SOURCE)
+            fetcher = self._get_contract_zone_fetcher(state.validators)
+            if not fetcher.has_changed():
+                logger.info("Helsinki contract zones have not changed, skipping import")
+                return None
+            features = fetcher.iter_features()
+
+        counts = self._process_contract_zones(features, force)
+        if counts["created"] or counts["updated"] or counts["deactivated"]:
+            # bulk queries do not send the signals that would do this
+            bump_contract_zone_index_version()
+        if fetcher:
+            state.validators = fetcher.validators
+            state.save(update_fields=("validators", "updated_at"))
+
+        logger.info(
+            "Helsinki contract zone import done! {created} created, {updated} updated, "
+            "{unchanged} unchanged, {deactivated} deactivated".format(**counts)
+        )
+        return counts
 
-    def _fetch_contract_zones(self):
+    def _get_contract_zone_fetcher(self, validators):
         contract_zone_filter_str = (
             ' AND "nimi" NOT IN ({})'.format(
                 ",".join(f"'{cz}'" for cz in EXCLUDED_CONTRACT_ZONES)
@@ -42,77 +86,139 @@ class HelsinkiImporter:
                 f"status='voimassa'{contract_zone_filter_str}"
             ),
             "outputFormat": "application/json",
+            # paging needs a stable order
+            "SORTBY": "nimi",
         }
-        wfs_url = (
-            f"{settings.HELSINKI_WFS_BASE_URL}?{urllib.parse.urlencode(query_params)}"
+        logger.debug(
+            f"Fetching contract zone data from {settings.HELSINKI_WFS_BASE_URL}"
         )
 
-        logger.debug(f"Fetching contract zone data from url {wfs_url}")
-        data_source = DataSource(wfs_url)
-        logger.debug(f"Fetched {len(data_source[0])} active contract zones")
-
-        return data_source
+        return WFSFeatureFetcher(
+            settings.HELSINKI_WFS_BASE_URL, query_params, validators=validators
+        )
 
     @transaction.atomic
-    def _process_contract_zones(self, data_source, force=False):
-        layer = data_source[0]
+    def _process_contract_zones(self, features, force=False):
+        """
+        Create, update and deactivate contract zones to match the given GeoJSON
+        features
+
+        A hash of every feature's data is stored on its contract zone, so zones whose
+        data has not changed since the previous import are skipped, and the changed
+        ones are written with bulk queries. Returns the number of created, updated,
+        unchanged and deactivated contract zones.
+        """
         syncher = ModelSyncher(
-            ContractZone.objects.all(), lambda x: x.name, self._deactivate_contract_zone
+            ContractZone.objects.all(),
+            lambda x: x.name,
+            bulk=True,
+            update_fields=[
+                *IMPORTED_FIELDS,
+                "active",
+                "import_hash",
+                "simplified_boundaries",
+            ],
+            deactivate_values={"active": False},
         )
+        created_count = 0
+        updated_count = 0
+        unchanged_count = 0
 
-        for feat in layer:
+        for feature in features:
+            properties = feature["properties"]
             data = {
-                "name": str(feat["nimi"]),
-                "boundary": feat.geom.geos,
-                "contractor": self._get_attribute_safe(feat, "urakoitsija"),
-                "contact_person": self._get_attribute_safe(feat, "talkoot"),
-                "email": self._get_attribute_safe(feat, "talkoot_email"),
-                "phone": self._get_attribute_safe(feat, "talkoot_puh"),
+                "name": str(properties["nimi"]),
+                "boundary": self._get_boundary(feature["geometry"]),
+                "contractor": self._get_attribute_safe(properties, "urakoitsija"),
+                "contact_person": self._get_attribute_safe(properties, "talkoot"),
+                "email": self._get_attribute_safe(properties, "talkoot_email"),
+                "phone": self._get_attribute_safe(properties, "talkoot_puh"),
                 "secondary_contact_person": self._get_attribute_safe(
-                    feat, "talkoot_varahlo"
+                    properties, "talkoot_varahlo"
                 ),
                 "secondary_email": self._get_attribute_safe(
-                    feat, "talkoot_varahlo_email"
+                    properties, "talkoot_varahlo_email"
                 ),
                 "secondary_phone": self._get_attribute_safe(
-                    feat, "talkoot_varahlo_puh"
+                    properties, "talkoot_varahlo_puh"
                 ),
-                "origin_id": str(feat["id"]),
-                "active": True,
+                "origin_id": str(properties.get("id", feature.get("id"))),
             }
+            import_hash = self._get_import_hash(data)
 
             contract_zone = syncher.get(data["name"])
             if contract_zone:
+                if contract_zone.active and contract_zone.import_hash == import_hash:
+                    syncher.mark(contract_zone)
+                    unchanged_count += 1
+                    continue
+
                 logger.info(
-                    "Updating contract zone {} (id {})".format(
+                    "Updating contract zone {} (id {})".format(
                         data["name"], data["origin_id"]
                     )
                 )
                 for field, new_value in data.items():
                     setattr(contract_zone, field, new_value)
+                updated_count += 1
             else:
                 logger.info(
-                    "Creating new contract zone {} (id {})".format(
+                    "Creating new contract zone {} (id {})".format(
                         data["name"], data["origin_id"]
                     )
                 )
                 contract_zone = ContractZone(**data)
+                created_count += 1
+
+            contract_zone.active = True
+            contract_zone.import_hash = import_hash
+            contract_zone.update_simplified_boundaries()
+            syncher.mark(contract_zone, changed=True)
+
+        deactivated = syncher.finish(force=force)
 
-            contract_zone.save()
-            syncher.mark(contract_zone)
+        return {
+            "created": created_count,
+            "updated": updated_count,
+            "unchanged": unchanged_count,
+            "deactivated": len(deactivated),
+        }
 
-        syncher.finish(force=force)
+    @staticmethod
+    def _get_import_hash(data):
+        """
+        Return a hash of the given contract zone data
+
+        The boundary is normalized before hashing, so that the hash does not depend on
+        e.g. the order of the polygons or the starting points of the rings.
+        """
+        boundary = data["boundary"].clone()
+        boundary.normalize()
+        attributes = {
+            field: value for field, value in data.items() if field != "boundary"
+        }
+
+        content_hash = hashlib.sha256(json.dumps(attributes, sort_keys=True).encode())
+        content_hash.update(bytes(boundary.wkb))
+        return content_hash.hexdigest()
 
     @staticmethod
-    def _get_attribute_safe(feature: Feature, attribute):
+    def _get_boundary(geometry):
+        boundary = GEOSGeometry(json.dumps(geometry))
+        boundary.srid = settings.DEFAULT_SRID
+        if isinstance(boundary, Polygon):
+            boundary = MultiPolygon(boundary, srid=boundary.srid)
+        return boundary
+
+    @staticmethod
+    def _get_attribute_safe(feature, attribute):
+        """
+        Return the attribute as a stripped string, or an empty string if it is missing
+
+        :param feature: GeoJSON feature properties dict or a GDAL feature
+        """
         try:
             value = feature.get(attribute)
         except IndexError:
             value = None
         return str(value).strip() if value is not None else ""
-
-    @staticmethod
-    def _deactivate_contract_zone(contract_zone):
-        if contract_zone.active:
-            contract_zone.active = False
-            contract_zone.save(update_fields=("active",))
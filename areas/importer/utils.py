@@ -4,7 +4,36 @@ logger = logging.getLogger(__name__)
 
 
 class ModelSyncher:
-    def __init__(self, queryset, generate_obj_id, delete_func=None, force=False):
+    """
+    Keeps track of which existing objects are found in the source system of an import
+
+    In the default mode, the importer saves the objects itself, and in finish() the
+    objects that were not found are deleted one by one with delete_func or delete().
+
+    In bulk mode, objects marked as changed are saved in finish() with one
+    bulk_create() for the new and one bulk_update() of update_fields for the
+    existing ones, and the objects that were not found are deleted or, if
+    deactivate_values is given, updated with those values in a single query.
+
+    :param queryset: Existing objects.
+    :param generate_obj_id: Function returning the source system ID of an object.
+    :param delete_func: Function deleting a single object, not used in bulk mode.
+    :param bulk: Whether to use the bulk mode.
+    :param update_fields: Fields to save when updating existing objects in bulk mode.
+    :param deactivate_values: Field values for "soft deleting" objects in bulk mode,
+        e.g. {"active": False}.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        generate_obj_id,
+        delete_func=None,
+        force=False,
+        bulk=False,
+        update_fields=None,
+        deactivate_values=None,
+    ):
         d = {}
         self.generate_obj_id = generate_obj_id
         # Generate a list of all objects
@@ -15,18 +44,29 @@ class ModelSyncher:
 
         self.obj_dict = d
         self.delete_func = delete_func
+        self.model = queryset.model
+        self.bulk = bulk
+        self.update_fields = update_fields
+        self.deactivate_values = deactivate_values
 
     @property
     def active_objs(self):
-        return [obj for obj in self.obj_dict.values() if obj.active]
+        return [obj for obj in self.obj_dict.values() if getattr(obj, "active", True)]
 
-    def mark(self, obj):
+    def mark(self, obj, changed=False):
+        """
+        Mark the object found in the source system
+
+        :param changed: Whether the object is new or has changed, and thus needs to be
+            saved in bulk mode.
+        """
         if getattr(obj, "_found", False):
             raise Exception(
                 f"Object {obj} ({self.generate_obj_id(obj)}) already marked"
             )
 
         obj._found = True
+        obj._changed = changed
         obj_id = self.generate_obj_id(obj)
         if obj_id not in self.obj_dict:
             self.obj_dict[obj_id] = obj
@@ -45,6 +85,7 @@ class ModelSyncher:
         return [obj for obj in self.active_objs if not obj._found]
 
     def finish(self, force=False):
+        """Delete the objects not found in the source system and return them"""
         delete_list = self.get_deleted_objects()
         if (
             len(delete_list) > 5
@@ -52,9 +93,42 @@ class ModelSyncher:
             and not force
         ):
             raise Exception("Attempting to delete more than 40% of total items")
+
+        if self.bulk:
+            self._save_changed_objects()
+            self._delete_objects(delete_list)
+            return delete_list
+
         for obj in delete_list:
             logger.debug(f"Deleting object {obj}")
             if self.delete_func:
                 self.delete_func(obj)
             else:
                 obj.delete()
+        return delete_list
+
+    def _save_changed_objects(self):
+        changed = [obj for obj in self.obj_dict.values() if obj._changed]
+        created = [obj for obj in changed if obj._state.adding]
+        updated = [obj for obj in changed if not obj._state.adding]
+
+        if created:
+            logger.debug(f"Creating {len(created)} object(s)")
+            self.model.objects.bulk_create(created)
+        if updated:
+            logger.debug(f"Updating {len(updated)} object(s)")
+            self.model.objects.bulk_update(updated, self.update_fields)
+
+    def _delete_objects(self, delete_list):
+        if not delete_list:
+            return
+
+        logger.debug(f"Deleting {len(delete_list)} object(s)")
+        queryset = self.model.objects.filter(pk__in=[obj.pk for obj in delete_list])
+        if self.deactivate_values:
+            queryset.update(**self.deactivate_values)
+            for obj in delete_list:
+                for field, value in self.deactivate_values.items():
+                    setattr(obj, field, value)
+        else:
+            queryset.delete()
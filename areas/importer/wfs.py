@@ -0,0 +1,117 @@
+import json
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500
+REQUEST_TIMEOUT = (5, 60)  # secs, connect and read
+RETRY = Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=(500, 502, 503, 504),
+    allowed_methods=("GET",),
+)
+
+
+class WFSFeatureFetcher:
+    """
+    Fetches GeoJSON features from a WFS 2.0 GetFeature endpoint page by page
+
+    Features are yielded one page at a time, so that they can be processed while the
+    rest are still being fetched. The ETag and Last-Modified headers of every fetched
+    page are collected to validators, which can be stored and given to the fetcher
+    of the next run for checking cheaply with conditional requests whether the data
+    has changed.
+    """
+
+    def __init__(self, url, query_params, page_size=None, validators=None):
+        self.url = url
+        self.query_params = query_params
+        self.page_size = page_size or PAGE_SIZE
+        self.previous_validators = validators or []
+        self.validators = []
+        self._prefetched_responses = {}
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(max_retries=RETRY)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def has_changed(self):
+        """
+        Check whether the data has changed since the previous validators were stored
+
+        Every previously fetched page is requested conditionally, which costs only a
+        response without a body per page when nothing has changed. If the last page
+        was full, new features could have been added to a new page, so the data is
+        then considered changed.
+        """
+        if (
+            not self.previous_validators
+            or self.previous_validators[-1]["feature_count"] >= self.page_size
+        ):
+            return True
+
+        for page, validators in enumerate(self.previous_validators):
+            if not (validators["etag"] or validators["last_modified"]):
+                return True
+            start_index = page * self.page_size
+            response = self._get_page(start_index, validators)
+            if response.status_code != requests.codes.not_modified:
+                self._prefetched_responses[start_index] = response
+                return True
+
+        logger.debug(f"No changes in {self.url}")
+        return False
+
+    def iter_features(self):
+        start_index = 0
+        while True:
+            response = self._prefetched_responses.pop(start_index, None)
+            if response is None:
+                response = self._get_page(start_index)
+            features = response.json()["features"]
+            logger.debug(f"Fetched {len(features)} features from index {start_index}")
+
+            self.validators.append(
+                {
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                    "feature_count": len(features),
+                }
+            )
+            yield from features
+
+            if len(features) < self.page_size:
+                break
+            start_index += self.page_size
+
+    def _get_page(self, start_index, validators=None):
+        headers = {}
+        if validators and validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators and validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        response = self._session.get(
+            self.url,
+            params={
+                **self.query_params,
+                "STARTINDEX": start_index,
+                "COUNT": self.page_size,
+            },
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response
+
+
+def iter_geojson_file_features(file_path):
+    """Yield the features of a local GeoJSON file, e.g. a saved WFS response"""
+    with open(file_path, encoding="utf-8") as f:
+        yield from json.load(f)["features"]
@@ -0,0 +1,96 @@
+"""
+Management command to benchmark the closest address lookup of the geo query API.
+
+Compares the latency of the original lookup, which orders the whole address table by
+distance, with the current KNN based lookup, using random points inside the extent of
+the imported addresses. Meant to be run against a realistically sized address table,
+e.g. after importing Helsinki addresses (~100k rows) with
+``python manage.py geo_import --addresses helsinki``.
+"""
+
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.gis.db.models import Extent
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+from munigeo.models import Address
+
+from areas.api import GeoQueryViewSet
+
+
+class Command(BaseCommand):
+    help = "Benchmark closest address lookups against the imported addresses"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--samples", type=int, default=100, help="Number of random points to use"
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed for generating the points"
+        )
+
+    def handle(self, *args, **options):
+        if options["samples"] < 2:
+            raise CommandError("At least 2 samples are needed.")
+
+        address_count = Address.objects.count()
+        if not address_count:
+            raise CommandError("There are no addresses, import them first.")
+
+        points = self._get_random_points(options["samples"], options["seed"])
+        self.stdout.write(
+            f"Benchmarking {len(points)} lookups against {address_count} addresses"
+        )
+
+        results = {}
+        for name, lookup in (
+            ("full scan", self._get_closest_address_full_scan),
+            ("KNN", GeoQueryViewSet.get_closest_address),
+        ):
+            timings = []
+            results[name] = []
+            for point in points:
+                start = time.perf_counter()
+                address = lookup(point)
+                timings.append((time.perf_counter() - start) * 1000)
+                results[name].append(address.pk if address else None)
+
+            self.stdout.write(
+                f"{name:>10}: median {statistics.median(timings):.2f} ms, "
+                f"p95 {statistics.quantiles(timings, n=20)[-1]:.2f} ms, "
+                f"max {max(timings):.2f} ms"
+            )
+
+        mismatches = sum(
+            old != new for old, new in zip(results["full scan"], results["KNN"])
+        )
+        self.stdout.write(f"Lookups with a different result: {mismatches}")
+
+    @staticmethod
+    def _get_random_points(count, seed):
+        x_min, y_min, x_max, y_max = Address.objects.aggregate(
+            extent=Extent("location")
+        )["extent"]
+        srid = Address._meta.get_field("location").srid
+        rng = random.Random(seed)
+
+        points = []
+        for _ in range(count):
+            point = Point(
+                rng.uniform(x_min, x_max), rng.uniform(y_min, y_max), srid=srid
+            )
+            point.transform(settings.DEFAULT_SRID)
+            points.append(point)
+        return points
+
+    @staticmethod
+    def _get_closest_address_full_scan(point):
+        return (
+            Address.objects.annotate(distance=Distance("location", point))
+            .order_by("distance")
+            .first()
+        )
@@ -10,6 +10,20 @@ class Command(BaseCommand):
         parser.add_argument(
             "--force", action="store_true", help="Skip deletion sanity check"
         )
+        parser.add_argument(
+            "--file",
+            help="Import from a local GeoJSON file instead of the WFS, e.g. one saved "
+            "earlier from the WFS",
+        )
 
     def handle(self, *args, **options):
-        HelsinkiImporter().import_contract_zones(options["force"])
+        counts = HelsinkiImporter().import_contract_zones(
+            options["force"], file_path=options["file"]
+        )
+        if counts is None:
+            self.stdout.write("No changes since the previous import")
+            return
+        self.stdout.write(
+            "{created} created, {updated} updated, {unchanged} unchanged, "
+            "{deactivated} deactivated".format(**counts)
+        )
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("areas", "0008_blockeddate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contractzone",
+            name="simplified_boundaries",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Boundary as GeoJSON simplified for different map zoom levels",
+                verbose_name="simplified boundaries",
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_contract_zone_statistics(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    ContractZoneStatistics = apps.get_model("areas", "ContractZoneStatistics")
+
+    rows = (
+        Event.objects.filter(state="approved")
+        .annotate(year=ExtractYear("start_time"), month=ExtractMonth("start_time"))
+        .values("contract_zone_id", "year", "month")
+        .annotate(
+            event_count=Count("id"),
+            estimated_attendee_count=Sum("estimated_attendee_count"),
+        )
+        .order_by()
+    )
+    ContractZoneStatistics.objects.bulk_create(
+        ContractZoneStatistics(**row) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("areas", "0009_add_contract_zone_simplified_boundaries"),
+        ("events", "0010_change_event_maintenance_location_optional"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContractZoneStatistics",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField(verbose_name="year")),
+                ("month", models.PositiveSmallIntegerField(verbose_name="month")),
+                (
+                    "event_count",
+                    models.PositiveIntegerField(default=0, verbose_name="event count"),
+                ),
+                (
+                    "estimated_attendee_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="estimated attendee count"
+                    ),
+                ),
+                (
+                    "contract_zone",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="statistics",
+                        to="areas.contractzone",
+                        verbose_name="contract zone",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "contract zone statistics",
+                "verbose_name_plural": "contract zone statistics",
+                "ordering": ("contract_zone", "year", "month"),
+                "unique_together": {("contract_zone", "year", "month")},
+            },
+        ),
+        migrations.RunPython(
+            populate_contract_zone_statistics, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,67 @@
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+TRASH_COUNT_FIELDS = (
+    "small_trash_bag_count",
+    "large_trash_bag_count",
+    "trash_picker_count",
+)
+
+
+def populate_trash_counts(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    ContractZoneStatistics = apps.get_model("areas", "ContractZoneStatistics")
+
+    rows = (
+        Event.objects.filter(state="approved")
+        .annotate(year=ExtractYear("start_time"), month=ExtractMonth("start_time"))
+        .values("contract_zone_id", "year", "month")
+        .annotate(**{field: Sum(field) for field in TRASH_COUNT_FIELDS})
+        .order_by()
+    )
+    statistics_by_bucket = {
+        (statistics.contract_zone_id, statistics.year, statistics.month): statistics
+        for statistics in ContractZoneStatistics.objects.all()
+    }
+    changed = []
+    for row in rows:
+        statistics = statistics_by_bucket.get(
+            (row["contract_zone_id"], row["year"], row["month"])
+        )
+        if statistics:
+            for field in TRASH_COUNT_FIELDS:
+                setattr(statistics, field, row[field])
+            changed.append(statistics)
+    ContractZoneStatistics.objects.bulk_update(changed, TRASH_COUNT_FIELDS)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("areas", "0010_contractzonestatistics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contractzonestatistics",
+            name="large_trash_bag_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="large trash bag count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="contractzonestatistics",
+            name="small_trash_bag_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="small trash bag count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="contractzonestatistics",
+            name="trash_picker_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="trash picker count"
+            ),
+        ),
+        migrations.RunPython(populate_trash_counts, migrations.RunPython.noop),
+    ]
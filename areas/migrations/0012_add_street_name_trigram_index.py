@@ -0,0 +1,19 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("areas", "0011_add_contract_zone_statistics_trash_counts"),
+        ("munigeo", "0005_update_translation_foreign_keys"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # used by the local address search, see areas.address_search
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS areas_street_name_trgm "
+            "ON munigeo_street_translation USING gin (lower(name) gin_trgm_ops)",
+            "DROP INDEX IF EXISTS areas_street_name_trgm",
+        ),
+    ]
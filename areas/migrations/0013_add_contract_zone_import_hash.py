@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("areas", "0012_add_street_name_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contractzone",
+            name="import_hash",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Hash of the imported data, used to detect changes",
+                max_length=64,
+                verbose_name="import hash",
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("areas", "0013_add_contract_zone_import_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportSourceState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="source"
+                    ),
+                ),
+                (
+                    "validators",
+                    models.JSONField(
+                        default=list,
+                        help_text=(
+                            "ETag and Last-Modified headers and feature count of every"
+                            " page"
+                        ),
+                        verbose_name="validators",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+            ],
+            options={
+                "verbose_name": "import source state",
+                "verbose_name_plural": "import source states",
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.timezone import localtime
+
+from common.utils import date_range, vacation_calendar
+
+
+def populate_zone_day_loads(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    ZoneDayLoad = apps.get_model("areas", "ZoneDayLoad")
+
+    counts = Counter()
+    events = Event.objects.exclude(contract_zone=None).values_list(
+        "contract_zone_id", "start_time", "end_time"
+    )
+    for contract_zone_id, start_time, end_time in events.iterator():
+        group_starts = {
+            vacation_calendar.get_group(date)[0]
+            for date in date_range(
+                localtime(start_time).date(), localtime(end_time).date()
+            )
+        }
+        counts.update((contract_zone_id, date) for date in group_starts)
+
+    ZoneDayLoad.objects.bulk_create(
+        ZoneDayLoad(contract_zone_id=contract_zone_id, date=date, event_count=count)
+        for (contract_zone_id, date), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("areas", "0014_importsourcestate"),
+        ("events", "0010_change_event_maintenance_location_optional"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ZoneDayLoad",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="date")),
+                (
+                    "event_count",
+                    models.PositiveIntegerField(default=0, verbose_name="event count"),
+                ),
+                (
+                    "contract_zone",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="day_loads",
+                        to="areas.contractzone",
+                        verbose_name="contract zone",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "zone day load",
+                "verbose_name_plural": "zone day loads",
+                "ordering": ("contract_zone", "date"),
+                "unique_together": {("contract_zone", "date")},
+            },
+        ),
+        migrations.RunPython(populate_zone_day_loads, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from collections import defaultdict
+import json
 from datetime import timedelta
 
 from django.conf import settings
@@ -8,10 +8,20 @@ from django.utils.translation import gettext_lazy as _
 from helsinki_gdpr.models import SerializableMixin
 from munigeo.utils import get_default_srid
 
-from common.utils import ONE_DAY, date_range, is_vacation_day
+from areas.availability import (
+    get_availability_horizon,
+    get_cached_unavailable_dates,
+    get_full_dates,
+)
+from common.utils import ONE_DAY, date_range, get_local_date, vacation_calendar
 
 PROJECTION_SRID = get_default_srid()
 
+# Map zoom levels for which simplified contract zone boundaries are precomputed
+SIMPLIFIED_BOUNDARY_ZOOM_LEVELS = (8, 10, 12, 14)
+MAP_TILE_SIZE = 256  # px
+EARTH_CIRCUMFERENCE = 40_075_016.686  # m
+
 
 class ContractZoneQuerySet(models.QuerySet):
     def get_by_location(self, location):
@@ -51,6 +61,20 @@ class ContractZone(SerializableMixin):
         blank=True,
     )
     active = models.BooleanField(verbose_name=_("active"), default=True)
+    simplified_boundaries = models.JSONField(
+        verbose_name=_("simplified boundaries"),
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text=_("Boundary as GeoJSON simplified for different map zoom levels"),
+    )
+    import_hash = models.CharField(
+        verbose_name=_("import hash"),
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text=_("Hash of the imported data, used to detect changes"),
+    )
 
     objects = ContractZoneQuerySet.as_manager()
 
@@ -62,10 +86,18 @@ class ContractZone(SerializableMixin):
     def __str__(self):
         return self.name
 
-    def get_unavailable_dates(self, exclude_event=None):
+    def get_unavailable_dates(self, exclude_event=None, use_cache=True):
         """
         Return a list of dates for which it is not possible to create an Event ATM.
+
+        The dates are cached unless an event to be excluded is given or use_cache is
+        False.
         """
+        if exclude_event or not use_cache:
+            return self._calculate_unavailable_dates(exclude_event)
+        return get_cached_unavailable_dates(self.pk, self._calculate_unavailable_dates)
+
+    def _calculate_unavailable_dates(self, exclude_event=None):
         today = localtime(now()).date()
         last_too_early_day = today + timedelta(
             days=settings.EVENT_MINIMUM_DAYS_BEFORE_START
@@ -81,29 +113,41 @@ class ContractZone(SerializableMixin):
 
         too_early_dates = {date for date in date_range(today, last_too_early_day)}
 
-        events = self.events.filter(start_time__date__gt=last_too_early_day)
-        if exclude_event:
-            events = events.exclude(pk=exclude_event.pk)
-        day_event_map = defaultdict(set)
-
-        for event in events:
-            for date in date_range(
-                localtime(event.start_time).date(), localtime(event.end_time).date()
-            ):
-                for affected_date in get_affected_dates(date):
-                    day_event_map[affected_date].add(event)
-
-        too_many_events_dates = {
-            date
-            for date, events in day_event_map.items()
-            if len(events) >= settings.EVENT_MAXIMUM_COUNT_PER_CONTRACT_ZONE
-        }
+        exclude_event_dates = None
+        if exclude_event and exclude_event.contract_zone_id == self.pk:
+            exclude_event_dates = (
+                get_local_date(exclude_event.start_time),
+                get_local_date(exclude_event.end_time),
+            )
+        too_many_events_dates = get_full_dates(
+            self.day_loads.all(),
+            last_too_early_day + ONE_DAY,
+            get_availability_horizon(),
+            exclude_event_dates,
+        )
 
         return sorted(too_early_dates | too_many_events_dates | blocked_dates)
 
     def get_contact_emails(self):
         return [email for email in (self.email, self.secondary_email) if email]
 
+    def get_simplified_boundary(self, zoom):
+        """
+        Return the boundary simplified for the given zoom level as a GeoJSON dict
+
+        The zoom level must be one of SIMPLIFIED_BOUNDARY_ZOOM_LEVELS. Uses the
+        precomputed value when there is one.
+        """
+        return self.simplified_boundaries.get(str(zoom)) or simplify_boundary(
+            self.boundary, zoom
+        )
+
+    def update_simplified_boundaries(self):
+        self.simplified_boundaries = {
+            str(zoom): simplify_boundary(self.boundary, zoom)
+            for zoom in SIMPLIFIED_BOUNDARY_ZOOM_LEVELS
+        }
+
 
 class BlockedDate(models.Model):
     date = models.DateField(verbose_name=_("date"))
@@ -140,6 +184,99 @@ class BlockedDate(models.Model):
         return f"{self.contract_zone.name} - {self.date}"
 
 
+class ZoneDayLoad(models.Model):
+    """
+    Number of events of a contract zone per vacation day group
+
+    The date is the first date of the group (see get_affected_dates), and an event is
+    counted once in every group it touches. Groups without events have no row. The
+    rows are maintained by events.zone_day_loads whenever events change, and can be
+    rebuilt with the rebuild_zone_day_loads management command.
+    """
+
+    contract_zone = models.ForeignKey(
+        ContractZone,
+        verbose_name=_("contract zone"),
+        related_name="day_loads",
+        on_delete=models.CASCADE,
+    )
+    date = models.DateField(verbose_name=_("date"))
+    event_count = models.PositiveIntegerField(verbose_name=_("event count"), default=0)
+
+    class Meta:
+        verbose_name = _("zone day load")
+        verbose_name_plural = _("zone day loads")
+        ordering = ("contract_zone", "date")
+        unique_together = ("contract_zone", "date")
+
+    def __str__(self):
+        return f"{self.contract_zone.name} - {self.date}: {self.event_count}"
+
+
+class ContractZoneStatistics(models.Model):
+    """
+    Monthly rollup of approved event statistics per contract zone
+
+    Maintained by events.statistics whenever events change, and can be rebuilt with
+    the rebuild_contract_zone_statistics management command.
+    """
+
+    contract_zone = models.ForeignKey(
+        ContractZone,
+        verbose_name=_("contract zone"),
+        related_name="statistics",
+        on_delete=models.CASCADE,
+    )
+    year = models.PositiveSmallIntegerField(verbose_name=_("year"))
+    month = models.PositiveSmallIntegerField(verbose_name=_("month"))
+    event_count = models.PositiveIntegerField(verbose_name=_("event count"), default=0)
+    estimated_attendee_count = models.PositiveIntegerField(
+        verbose_name=_("estimated attendee count"), default=0
+    )
+    small_trash_bag_count = models.PositiveIntegerField(
+        verbose_name=_("small trash bag count"), default=0
+    )
+    large_trash_bag_count = models.PositiveIntegerField(
+        verbose_name=_("large trash bag count"), default=0
+    )
+    trash_picker_count = models.PositiveIntegerField(
+        verbose_name=_("trash picker count"), default=0
+    )
+
+    class Meta:
+        verbose_name = _("contract zone statistics")
+        verbose_name_plural = _("contract zone statistics")
+        ordering = ("contract_zone", "year", "month")
+        unique_together = ("contract_zone", "year", "month")
+
+    def __str__(self):
+        return f"{self.contract_zone.name} - {self.year}/{self.month}"
+
+
+class ImportSourceState(models.Model):
+    """
+    HTTP validators of the data an importer fetched on its previous run
+
+    Used for conditional requests, so that an unchanged data source can be detected
+    without downloading it again.
+    """
+
+    source = models.CharField(verbose_name=_("source"), max_length=255, unique=True)
+    validators = models.JSONField(
+        verbose_name=_("validators"),
+        default=list,
+        help_text=_("ETag and Last-Modified headers and feature count of every page"),
+    )
+    updated_at = models.DateTimeField(verbose_name=_("updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("import source state")
+        verbose_name_plural = _("import source states")
+
+    def __str__(self):
+        return self.source
+
+
 def get_affected_dates(date):
     """
     Return a list of all the dates in the "vacation day group" the given date belongs to
@@ -159,11 +296,25 @@ def get_affected_dates(date):
     For Thu, Fri, Sat, Sun or next week Mon when Thu, Fri and next week Mon are
     national holidays, this this will return [Thu, Fri, Sat, Sun, next week Mon]
     """
-    start_date = end_date = date
-
-    while is_vacation_day(start_date):
-        start_date -= ONE_DAY
-    while is_vacation_day(end_date + ONE_DAY):
-        end_date += ONE_DAY
+    start_date, end_date = vacation_calendar.get_group(date)
 
     return [d for d in date_range(start_date, end_date)]
+
+
+def simplify_boundary(boundary, zoom):
+    """
+    Return the given boundary simplified for the given map zoom level as a GeoJSON dict
+
+    The simplification tolerance is the size of one map tile pixel at the zoom level,
+    so the simplification should not be visible on the map.
+    """
+    if boundary.srs.geographic:
+        tolerance = 360 / (MAP_TILE_SIZE * 2**zoom)
+    else:
+        tolerance = EARTH_CIRCUMFERENCE / (MAP_TILE_SIZE * 2**zoom)
+
+    simplified = boundary.simplify(tolerance, preserve_topology=True)
+    if simplified.srid != 4326:
+        simplified.transform(4326)
+
+    return json.loads(simplified.json)
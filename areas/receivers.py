@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from areas.availability import invalidate_unavailable_dates
+from areas.models import BlockedDate, ContractZone
+from areas.spatial_index import bump_contract_zone_index_version
+
+
+@receiver(post_save, sender=BlockedDate, dispatch_uid="blocked_date_saved")
+@receiver(post_delete, sender=BlockedDate, dispatch_uid="blocked_date_deleted")
+def invalidate_unavailable_dates_on_blocked_date_change(sender, instance, **kwargs):
+    invalidate_unavailable_dates(instance.contract_zone_id)
+
+
+@receiver(post_save, sender=ContractZone, dispatch_uid="contract_zone_saved")
+@receiver(post_delete, sender=ContractZone, dispatch_uid="contract_zone_deleted")
+def bump_contract_zone_index_version_on_change(sender, **kwargs):
+    bump_contract_zone_index_version()
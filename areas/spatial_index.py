@@ -0,0 +1,132 @@
+import threading
+from copy import copy
+
+from areas.models import PROJECTION_SRID, ContractZone
+from common.cache_versions import bump_cache_versions, get_cache_version
+
+VERSION_KEY = "contract_zones"
+NODE_CAPACITY = 8
+
+
+def bump_contract_zone_index_version():
+    """
+    Make every process rebuild its contract zone index on the next lookup
+
+    The version is stored in the database in the current transaction, so processes
+    start to use it when the changed zones are committed.
+    """
+    bump_cache_versions(VERSION_KEY)
+
+
+def get_contract_zone_index_version():
+    """Return the current version of the contract zone data"""
+    return get_cache_version(VERSION_KEY)
+
+
+class ContractZoneIndex:
+    """
+    In-process spatial index of contract zones for point-in-zone lookups
+
+    Contract zones are few and they change rarely, so they are kept in memory as
+    prepared GEOS geometries packed into bounding box nodes the same way an STR tree
+    does. A lookup checks the node and zone bounding boxes first and runs the actual
+    covers check only for the remaining candidates, so the only database round trip
+    is fetching the version of the contract zone data.
+
+    The index is rebuilt when the version stored in the database has changed, which
+    happens when contract zones are saved, deleted or imported.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._nodes = None
+
+    def get_by_location(self, location):
+        return self._get_by_location(location, active_only=False)
+
+    def get_active_by_location(self, location):
+        return self._get_by_location(location, active_only=True)
+
+    def get_active_by_locations(self, locations):
+        """
+        Return a list of the active contract zones of the given locations
+
+        The version of the contract zone data is fetched only once for all of them.
+        """
+        version = get_contract_zone_index_version()
+        return [
+            self._get_by_location(location, active_only=True, version=version)
+            for location in locations
+        ]
+
+    def _get_by_location(self, location, active_only, version=None):
+        # like the boundary__covers lookup, points without an SRID are taken to be
+        # in the boundary field's SRID
+        if location.srid and location.srid != PROJECTION_SRID:
+            location = location.transform(PROJECTION_SRID, clone=True)
+        x, y = location.x, location.y
+
+        if version is None:
+            version = get_contract_zone_index_version()
+
+        # GEOS prepared geometries are not safe to be used from several threads at
+        # the same time, so the whole lookup is done while holding the lock
+        with self._lock:
+            if self._nodes is None or version != self._version:
+                self._nodes = self._build()
+                self._version = version
+
+            matches = [
+                zone
+                for node_extent, entries in self._nodes
+                if _contains(node_extent, x, y)
+                for extent, prepared, zone in entries
+                if (zone.active or not active_only)
+                and _contains(extent, x, y)
+                and prepared.covers(location)
+            ]
+
+        if not matches:
+            return None
+        return copy(min(matches, key=lambda zone: zone.pk))
+
+    @staticmethod
+    def _build():
+        entries = []
+        for zone in ContractZone.objects.all():
+            entries.append((zone.boundary.extent, zone.boundary.prepared, zone))
+
+        # sort-tile-recursive packing: sort by x into vertical slices, then by y
+        # inside each slice, and chunk the slices into nodes
+        entries.sort(key=lambda entry: entry[0][0] + entry[0][2])
+        node_count = -(-len(entries) // NODE_CAPACITY)
+        slice_count = max(1, round(node_count**0.5))
+        slice_size = -(-len(entries) // slice_count) if entries else 1
+
+        nodes = []
+        for slice_start in range(0, len(entries), slice_size):
+            entry_slice = sorted(
+                entries[slice_start : slice_start + slice_size],
+                key=lambda entry: entry[0][1] + entry[0][3],
+            )
+            for node_start in range(0, len(entry_slice), NODE_CAPACITY):
+                node_entries = entry_slice[node_start : node_start + NODE_CAPACITY]
+                extents = [extent for extent, _prepared, _zone in node_entries]
+                node_extent = (
+                    min(extent[0] for extent in extents),
+                    min(extent[1] for extent in extents),
+                    max(extent[2] for extent in extents),
+                    max(extent[3] for extent in extents),
+                )
+                nodes.append((node_extent, node_entries))
+
+        return nodes
+
+
+def _contains(extent, x, y):
+    x_min, y_min, x_max, y_max = extent
+    return x_min <= x <= x_max and y_min <= y <= y_max
+
+
+contract_zone_index = ContractZoneIndex()
@@ -1,10 +1,26 @@
+from datetime import timedelta
+
 import pytest
 import responses
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+from freezegun import freeze_time
 from responses import matchers
 
-from areas.digitransit import DigitransitApiError
+from areas import digitransit
+from areas.digitransit import (
+    CACHE_EMPTY_FRESH_TIME,
+    CACHE_FRESH_TIME,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_TIMEOUT,
+    METRICS_LOG_INTERVAL,
+    DigitransitApiError,
+    DigitransitClient,
+)
 from common.tests.utils import get
 
+from ..factories import AddressFactory, StreetFactory
+
 ADDRESS_SEARCH_URL = "/v1/address_search/"
 
 MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL = "http://localhost:9999/digitransit/v1/search"
@@ -29,6 +45,13 @@ def mocked_responses(settings):
         yield rsps
 
 
+@pytest.fixture(autouse=True)
+def digitransit_client(monkeypatch):
+    client = DigitransitClient()
+    monkeypatch.setattr(digitransit, "digitransit_client", client)
+    return client
+
+
 MOCK_RESPONSE = {
     "geocoding": {
         "version": "0.2",
@@ -305,3 +328,251 @@ def test_address_search_returns_error_when_digitransit_responds_improper_json(
     with pytest.raises(DigitransitApiError) as e:
         get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie&language=fi")
     assert "KeyError" in str(e)
+
+
+def test_address_search_results_are_cached_by_normalized_query(
+    api_client, mocked_responses
+):
+    mocked_responses.get(
+        MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL,
+        match=[
+            matchers.query_param_matcher({"text": "lumikintie 4"}, strict_match=False)
+        ],
+        json=MOCK_RESPONSE,
+        status=200,
+    )
+
+    response_1 = get(api_client, ADDRESS_SEARCH_URL + "?text=Lumikintie 4")
+    response_2 = get(api_client, ADDRESS_SEARCH_URL + "?text= lumikintie   4 ")
+
+    assert response_1 == response_2 == expected_response
+    assert len(mocked_responses.calls) == 1
+
+
+def test_address_search_results_are_cached_per_language(api_client, mocked_responses):
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, json=MOCK_RESPONSE)
+
+    get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie&language=fi")
+    get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie&language=sv")
+
+    assert len(mocked_responses.calls) == 2
+
+
+def test_address_search_empty_results_are_cached_for_shorter_time(
+    api_client, mocked_responses
+):
+    empty_response = {"type": "FeatureCollection", "features": []}
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, json=empty_response)
+    url = ADDRESS_SEARCH_URL + "?text=nonexistent"
+
+    assert get(api_client, url) == empty_response
+    assert get(api_client, url) == empty_response
+    assert len(mocked_responses.calls) == 1
+
+    with freeze_time(timezone.now() + timedelta(seconds=CACHE_EMPTY_FRESH_TIME + 1)):
+        get(api_client, url)
+    assert len(mocked_responses.calls) == 2
+
+
+def test_address_search_stale_result_is_refreshed(api_client, mocked_responses):
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, json=MOCK_RESPONSE)
+    url = ADDRESS_SEARCH_URL + "?text=lumikintie"
+    get(api_client, url)
+
+    with freeze_time(timezone.now() + timedelta(seconds=CACHE_FRESH_TIME + 1)):
+        assert get(api_client, url) == expected_response
+        assert len(mocked_responses.calls) == 2
+        get(api_client, url)
+        assert len(mocked_responses.calls) == 2
+
+
+def test_address_search_stale_result_is_used_when_digitransit_fails(
+    api_client, mocked_responses
+):
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, json=MOCK_RESPONSE)
+    url = ADDRESS_SEARCH_URL + "?text=lumikintie"
+    get(api_client, url)
+
+    mocked_responses.replace(
+        responses.GET, MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, status=503
+    )
+    with freeze_time(timezone.now() + timedelta(seconds=CACHE_FRESH_TIME + 1)):
+        assert get(api_client, url) == expected_response
+    assert len(mocked_responses.calls) == 2
+
+
+def test_address_search_circuit_breaker(
+    api_client, mocked_responses, digitransit_client
+):
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, status=503)
+
+    for i in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(DigitransitApiError):
+            get(api_client, ADDRESS_SEARCH_URL + f"?text=street {i}")
+    assert digitransit_client.get_metrics()["circuit_state"] == "open"
+
+    # fails fast without contacting Digitransit
+    with pytest.raises(DigitransitApiError) as e:
+        get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie")
+    assert "circuit breaker is open" in str(e)
+    assert len(mocked_responses.calls) == CIRCUIT_BREAKER_FAILURE_THRESHOLD
+
+    mocked_responses.replace(
+        responses.GET, MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, json=MOCK_RESPONSE
+    )
+    with freeze_time(timezone.now() + timedelta(seconds=CIRCUIT_BREAKER_RESET_TIMEOUT)):
+        assert get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie") == (
+            expected_response
+        )
+
+    metrics = digitransit_client.get_metrics()
+    assert metrics["circuit_state"] == "closed"
+    assert metrics["request_count"] == CIRCUIT_BREAKER_FAILURE_THRESHOLD + 1
+    assert metrics["failed_request_count"] == CIRCUIT_BREAKER_FAILURE_THRESHOLD
+    assert metrics["rejected_request_count"] == 1
+    assert metrics["latency_seconds"]["buckets"]["+Inf"] == metrics["request_count"]
+
+
+def test_address_search_circuit_breaker_reopens_on_failed_trial(
+    api_client, mocked_responses, digitransit_client
+):
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, status=503)
+    for i in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(DigitransitApiError):
+            get(api_client, ADDRESS_SEARCH_URL + f"?text=street {i}")
+
+    with freeze_time(timezone.now() + timedelta(seconds=CIRCUIT_BREAKER_RESET_TIMEOUT)):
+        with pytest.raises(DigitransitApiError):
+            get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie")
+        assert digitransit_client.get_metrics()["circuit_state"] == "open"
+        with pytest.raises(DigitransitApiError) as e:
+            get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie")
+        assert "circuit breaker is open" in str(e)
+
+    assert len(mocked_responses.calls) == CIRCUIT_BREAKER_FAILURE_THRESHOLD + 1
+
+
+def test_address_search_circuit_breaker_reopens_on_unexpected_trial_error(
+    api_client, mocked_responses, digitransit_client, monkeypatch
+):
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, status=503)
+    for i in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD):
+        with pytest.raises(DigitransitApiError):
+            get(api_client, ADDRESS_SEARCH_URL + f"?text=street {i}")
+
+    def raise_error(*args, **kwargs):
+        raise RuntimeError("unexpected")
+
+    with freeze_time(timezone.now() + timedelta(seconds=CIRCUIT_BREAKER_RESET_TIMEOUT)):
+        monkeypatch.setattr(digitransit_client, "_address_search", raise_error)
+        with pytest.raises(RuntimeError):
+            get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie")
+
+    metrics = digitransit_client.get_metrics()
+    assert metrics["circuit_state"] == "open"
+    assert metrics["failed_request_count"] == CIRCUIT_BREAKER_FAILURE_THRESHOLD + 1
+
+
+def test_address_search_invalid_json_is_an_api_error(
+    api_client, mocked_responses, digitransit_client
+):
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, body="not json")
+
+    with pytest.raises(DigitransitApiError):
+        get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie")
+    assert digitransit_client.get_metrics()["failed_request_count"] == 1
+
+
+def test_address_search_metrics_are_logged(
+    api_client, mocked_responses, digitransit_client, caplog
+):
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, json=MOCK_RESPONSE)
+    caplog.set_level("INFO", logger="areas.digitransit")
+
+    get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie")
+    assert "Digitransit API client metrics" not in caplog.text
+
+    with freeze_time(timezone.now() + timedelta(seconds=METRICS_LOG_INTERVAL)):
+        get(api_client, ADDRESS_SEARCH_URL + "?text=other street")
+    assert '"request_count": 2' in caplog.text
+
+
+@pytest.fixture
+def local_addresses():
+    street = StreetFactory()
+    street.set_current_language("fi")
+    street.name = "Lumikintie"
+    street.set_current_language("sv")
+    street.name = "Snövitsvägen"
+    street.save()
+    other_street = StreetFactory()
+    other_street.set_current_language("fi")
+    other_street.name = "Kivikatu"
+    other_street.save()
+
+    addresses = [
+        AddressFactory(
+            street=street,
+            number=number,
+            number_end="",
+            letter=letter,
+            location=Point(25.05 + idx * 0.001, 60.2),
+        )
+        for idx, (number, letter) in enumerate(
+            (("4", ""), ("4", "A"), ("5", ""), ("12", ""))
+        )
+    ]
+    addresses.append(
+        AddressFactory(
+            street=other_street,
+            number="4",
+            number_end="",
+            letter="",
+            location=Point(25.1, 60.2),
+        )
+    )
+    return addresses
+
+
+@pytest.mark.parametrize(
+    "query_string, expected_names",
+    [
+        (
+            "text=Lumikintie 4",
+            ["Lumikintie 4", "Lumikintie 4A"],
+        ),
+        ("text=lumikintie 4 a", ["Lumikintie 4A"]),
+        (
+            "text=lumikint",
+            ["Lumikintie 4", "Lumikintie 4A", "Lumikintie 5", "Lumikintie 12"],
+        ),
+        ("text=kivikatu 4", ["Kivikatu 4"]),
+        ("text=lumikintei 5", ["Lumikintie 5"]),
+        ("text=snövitsvägen 5&language=sv", ["Snövitsvägen 5"]),
+        ("text=lumikintie 5&language=sv", ["Lumikintie 5"]),
+    ],
+)
+def test_local_address_search(
+    api_client, settings, local_addresses, query_string, expected_names
+):
+    settings.ADDRESS_SEARCH_BACKEND = "local"
+
+    response = get(api_client, f"{ADDRESS_SEARCH_URL}?{query_string}")
+
+    assert response["type"] == "FeatureCollection"
+    assert [
+        feature["properties"]["name"] for feature in response["features"]
+    ] == expected_names
+    assert response["features"][0]["geometry"]["type"] == "Point"
+
+
+def test_local_address_search_falls_back_to_digitransit(
+    api_client, settings, mocked_responses
+):
+    settings.ADDRESS_SEARCH_BACKEND = "local"
+    mocked_responses.get(MOCK_DIGITRANSIT_ADDRESS_SEARCH_URL, json=MOCK_RESPONSE)
+
+    response = get(api_client, ADDRESS_SEARCH_URL + "?text=lumikintie")
+
+    assert response == expected_response
+    assert len(mocked_responses.calls) == 1
@@ -0,0 +1,316 @@
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.utils.timezone import make_aware
+
+from common.models import CacheVersion
+from common.tests.utils import get_advisory_locks
+from events.factories import EventFactory
+from events.models import Event
+from events.zone_day_loads import (
+    rebuild_zone_day_loads,
+    update_zone_day_loads_for_event,
+)
+
+from ..availability import (
+    get_full_dates,
+    get_group_event_counts,
+)
+from ..factories import BlockedDateFactory, ContractZoneFactory
+from ..models import ZoneDayLoad
+
+
+@pytest.fixture(autouse=True)
+def override_settings(settings):
+    settings.EVENT_MAXIMUM_COUNT_PER_CONTRACT_ZONE = 2
+
+
+@pytest.fixture
+def contract_zone():
+    return ContractZoneFactory()
+
+
+def get_day_loads(contract_zone):
+    return dict(contract_zone.day_loads.values_list("date", "event_count"))
+
+
+def create_event(contract_zone, day, **kwargs):
+    start_time = make_aware(datetime(2018, 12, day, 12))
+    return EventFactory(
+        contract_zone=contract_zone,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=2),
+        **kwargs,
+    )
+
+
+def test_multi_day_event_is_counted_once_per_group(contract_zone):
+    # 2018-12-14 = Friday, the event lasts the whole weekend
+    start_time = make_aware(datetime(2018, 12, 14, 12))
+    EventFactory(
+        contract_zone=contract_zone,
+        start_time=start_time,
+        end_time=start_time + timedelta(days=2),
+    )
+
+    group_event_counts = get_group_event_counts(
+        Event.objects.filter(contract_zone=contract_zone),
+        date(2018, 12, 10),
+        date(2018, 12, 31),
+    )
+
+    assert group_event_counts == {date(2018, 12, 14): 1}
+    assert get_day_loads(contract_zone) == {date(2018, 12, 14): 1}
+
+
+def test_full_dates(contract_zone):
+    # 2018-12-14 = Friday and 2018-12-17 = Monday
+    for day in (14, 16, 17):
+        create_event(contract_zone, day)
+    for _ in range(2):
+        create_event(ContractZoneFactory(), 17)
+
+    full_dates = get_full_dates(
+        contract_zone.day_loads.all(), date(2018, 12, 10), date(2018, 12, 31)
+    )
+
+    assert full_dates == {date(2018, 12, 14), date(2018, 12, 15), date(2018, 12, 16)}
+
+
+def test_full_dates_exclude_event(contract_zone):
+    for day in (14, 16):
+        create_event(contract_zone, day)
+
+    full_dates = get_full_dates(
+        contract_zone.day_loads.all(),
+        date(2018, 12, 10),
+        date(2018, 12, 31),
+        exclude_event_dates=(date(2018, 12, 16), date(2018, 12, 16)),
+    )
+
+    assert full_dates == set()
+
+
+def test_full_dates_start_in_the_middle_of_a_group(contract_zone):
+    for day in (14, 16):
+        create_event(contract_zone, day)
+
+    full_dates = get_full_dates(
+        contract_zone.day_loads.all(), date(2018, 12, 15), date(2018, 12, 31)
+    )
+
+    assert full_dates == {date(2018, 12, 15), date(2018, 12, 16)}
+
+
+def test_day_loads_updated_on_event_changes(contract_zone):
+    event = create_event(contract_zone, 14)
+    create_event(contract_zone, 16)
+    assert get_day_loads(contract_zone) == {date(2018, 12, 14): 2}
+
+    event = Event.objects.get(pk=event.pk)
+    event.start_time += timedelta(days=4)
+    event.end_time += timedelta(days=4)
+    event.save()
+    assert get_day_loads(contract_zone) == {
+        date(2018, 12, 14): 1,
+        date(2018, 12, 18): 1,
+    }
+
+    other_contract_zone = ContractZoneFactory()
+    event.contract_zone = other_contract_zone
+    event.save()
+    assert get_day_loads(contract_zone) == {date(2018, 12, 14): 1}
+    assert get_day_loads(other_contract_zone) == {date(2018, 12, 18): 1}
+
+    event.delete()
+    assert get_day_loads(other_contract_zone) == {}
+
+
+def test_day_load_updates_lock_old_and_new_groups(contract_zone):
+    event = Event.objects.get(pk=create_event(contract_zone, 14).pk)
+    other_contract_zone = ContractZoneFactory()
+
+    # 2018-12-14 = Friday and 2018-12-17 = Monday
+    event.contract_zone = other_contract_zone
+    event.start_time += timedelta(days=3)
+    event.end_time += timedelta(days=3)
+    event.save()
+
+    assert {
+        (contract_zone.pk, date(2018, 12, 14).toordinal()),
+        (other_contract_zone.pk, date(2018, 12, 17).toordinal()),
+    } <= get_advisory_locks()
+
+
+def test_day_loads_not_updated_when_dates_do_not_change(
+    contract_zone, django_assert_num_queries
+):
+    event = Event.objects.get(pk=create_event(contract_zone, 14).pk)
+
+    with django_assert_num_queries(0):
+        update_zone_day_loads_for_event(event)
+
+
+def test_rebuild_zone_day_loads(contract_zone):
+    for day in (14, 16, 17):
+        create_event(contract_zone, day)
+    ZoneDayLoad.objects.all().delete()
+
+    assert rebuild_zone_day_loads() == 2
+    assert get_day_loads(contract_zone) == {
+        date(2018, 12, 14): 2,
+        date(2018, 12, 17): 1,
+    }
+
+
+def test_unavailable_dates_exclude_event(contract_zone):
+    start_time = make_aware(datetime(2018, 1, 30, 12))
+    event, _ = EventFactory.create_batch(
+        2,
+        contract_zone=contract_zone,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=2),
+    )
+
+    assert start_time.date() in contract_zone.get_unavailable_dates()
+    assert start_time.date() not in contract_zone.get_unavailable_dates(
+        exclude_event=event
+    )
+    other_zone_event = EventFactory(contract_zone=ContractZoneFactory())
+    assert start_time.date() in contract_zone.get_unavailable_dates(
+        exclude_event=other_zone_event
+    )
+
+
+def test_unavailable_dates_are_cached(contract_zone, django_assert_num_queries):
+    contract_zone.get_unavailable_dates()
+
+    # only the zone's version is fetched
+    with django_assert_num_queries(1):
+        contract_zone.get_unavailable_dates()
+
+
+def test_unavailable_dates_cache_invalidated_on_event_changes(
+    contract_zone, django_capture_on_commit_callbacks
+):
+    start_time = make_aware(datetime(2018, 1, 30, 12))
+    with django_capture_on_commit_callbacks(execute=True):
+        event_1, event_2 = EventFactory.create_batch(
+            2,
+            contract_zone=contract_zone,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=2),
+        )
+    assert start_time.date() in contract_zone.get_unavailable_dates()
+
+    other_contract_zone = ContractZoneFactory()
+    assert start_time.date() not in other_contract_zone.get_unavailable_dates()
+
+    event_2 = Event.objects.get(pk=event_2.pk)
+    event_2.contract_zone = other_contract_zone
+    with django_capture_on_commit_callbacks(execute=True):
+        event_2.save()
+    assert start_time.date() not in contract_zone.get_unavailable_dates()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        EventFactory(
+            contract_zone=other_contract_zone,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=2),
+        )
+    assert start_time.date() in other_contract_zone.get_unavailable_dates()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        event_2.delete()
+    assert start_time.date() not in other_contract_zone.get_unavailable_dates()
+
+
+def test_unavailable_dates_cache_invalidated_after_commit(
+    contract_zone, django_capture_on_commit_callbacks
+):
+    start_time = make_aware(datetime(2018, 1, 30, 12))
+    EventFactory(
+        contract_zone=contract_zone,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=2),
+    )
+    assert start_time.date() not in contract_zone.get_unavailable_dates()
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        EventFactory(
+            contract_zone=contract_zone,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=2),
+        )
+        # the version row is not touched by the transaction itself
+        assert not CacheVersion.objects.filter(
+            key__startswith="unavailable_dates"
+        ).exists()
+
+    for callback in callbacks:
+        callback()
+    assert start_time.date() in contract_zone.get_unavailable_dates()
+
+
+def test_unavailable_dates_cache_invalidated_on_blocked_date_changes(
+    contract_zone, django_capture_on_commit_callbacks
+):
+    blocked_date = date(2018, 1, 30)
+    assert blocked_date not in contract_zone.get_unavailable_dates()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        blocked_date_obj = BlockedDateFactory(
+            contract_zone=contract_zone, date=blocked_date
+        )
+    assert blocked_date in contract_zone.get_unavailable_dates()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        blocked_date_obj.delete()
+    assert blocked_date not in contract_zone.get_unavailable_dates()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bookings_in_different_groups_of_a_zone_do_not_block_each_other(
+    contract_zone,
+):
+    def create_event(day):
+        return EventFactory(
+            contract_zone=contract_zone,
+            state=Event.WAITING_FOR_APPROVAL,
+            start_time=make_aware(datetime(2018, 1, day, 12)),
+            end_time=make_aware(datetime(2018, 1, day, 14)),
+        )
+
+    created = threading.Event()
+    release = threading.Event()
+
+    def create_event_in_transaction():
+        try:
+            with transaction.atomic():
+                create_event(29)
+                created.set()
+                release.wait(5)
+        finally:
+            connection.close()
+
+    def create_other_event():
+        try:
+            # 2018-01-29 and 2018-01-30 are in different vacation day groups
+            create_event(30)
+        finally:
+            connection.close()
+
+    first = threading.Thread(target=create_event_in_transaction)
+    first.start()
+    try:
+        assert created.wait(5)
+        second = threading.Thread(target=create_other_event)
+        second.start()
+        second.join(5)
+        assert not second.is_alive()
+    finally:
+        release.set()
+        first.join()
+    assert Event.objects.filter(contract_zone=contract_zone).count() == 2
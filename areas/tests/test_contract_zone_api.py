@@ -1,6 +1,7 @@
 from datetime import datetime
 
 import pytest
+from django.contrib.gis.geos import MultiPolygon, Point
 from django.utils.timezone import make_aware
 from rest_framework.reverse import reverse
 
@@ -11,6 +12,7 @@ from events.models import Event
 from ..factories import ContractZoneFactory
 
 LIST_URL = reverse("v1:contractzone-list")
+BOUNDARIES_URL = reverse("v1:contractzone-boundaries")
 
 
 @pytest.fixture
@@ -89,3 +91,67 @@ def test_get_list_official_check_contact_data(contract_zone, official_api_client
     assert contract_zone_data["contact_person"] == contract_zone.contact_person
     assert contract_zone_data["email"] == contract_zone.email
     assert contract_zone_data["phone"] == contract_zone.phone
+
+
+def get_circle_zone(**kwargs):
+    return ContractZoneFactory(
+        boundary=MultiPolygon(Point(24.9, 60.2).buffer(0.1, quadsegs=64)), **kwargs
+    )
+
+
+def test_get_boundaries(api_client):
+    contract_zone = get_circle_zone()
+    get_circle_zone(active=False)
+
+    response_data = get(api_client, BOUNDARIES_URL)
+
+    assert response_data["type"] == "FeatureCollection"
+    assert len(response_data["features"]) == 1
+    feature = response_data["features"][0]
+    assert feature["id"] == contract_zone.id
+    assert feature["properties"] == {"id": contract_zone.id, "name": contract_zone.name}
+    assert feature["geometry"]["type"] == "MultiPolygon"
+
+
+def test_get_boundaries_simplified_by_zoom(api_client):
+    get_circle_zone()
+
+    point_counts = []
+    for zoom in (8, 9, 12, 20):
+        response_data = get(api_client, BOUNDARIES_URL + f"?zoom={zoom}")
+        geometry = response_data["features"][0]["geometry"]
+        point_counts.append(len(geometry["coordinates"][0][0]))
+
+    assert point_counts[0] == point_counts[1]
+    assert point_counts[1] < point_counts[2] < point_counts[3]
+
+
+def test_get_boundaries_uses_precomputed_boundaries(api_client):
+    contract_zone = get_circle_zone()
+    contract_zone.update_simplified_boundaries()
+    contract_zone.simplified_boundaries["12"]["coordinates"][0][0][0] = [1.0, 2.0]
+    contract_zone.save()
+
+    response_data = get(api_client, BOUNDARIES_URL + "?zoom=12")
+
+    geometry = response_data["features"][0]["geometry"]
+    assert geometry["coordinates"][0][0][0] == [1.0, 2.0]
+
+
+def test_get_boundaries_etag(api_client):
+    contract_zone = get_circle_zone()
+
+    response = api_client.get(BOUNDARIES_URL)
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    response = api_client.get(BOUNDARIES_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    contract_zone.name = "new name"
+    contract_zone.save()
+
+    response = api_client.get(BOUNDARIES_URL, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
@@ -0,0 +1,108 @@
+import csv
+import json
+from datetime import datetime
+
+import pytest
+from django.utils.timezone import make_aware
+from rest_framework.reverse import reverse
+
+from common.tests.utils import get
+from events.factories import EventFactory
+from events.models import Event
+
+from ..factories import ContractZoneFactory
+
+LIST_URL = reverse("v1:contract_zone_statistics-list")
+
+
+@pytest.fixture
+def contract_zone():
+    return ContractZoneFactory()
+
+
+def get_streamed_content(api_client, url):
+    response = api_client.get(url)
+    assert response.status_code == 200
+    return b"".join(response.streaming_content).decode()
+
+
+def test_statistics_permissions(api_client, user_api_client):
+    assert api_client.get(LIST_URL).status_code in (401, 403)
+    get(user_api_client, LIST_URL, status_code=403)
+
+
+def test_get_statistics_json(contract_zone, official_api_client):
+    event_1, event_2 = EventFactory.create_batch(
+        2, contract_zone=contract_zone, start_time=make_aware(datetime(2017, 3, 3))
+    )
+    event_3 = EventFactory(
+        contract_zone=contract_zone, start_time=make_aware(datetime(2018, 5, 3))
+    )
+    EventFactory(
+        contract_zone=contract_zone,
+        start_time=make_aware(datetime(2018, 5, 4)),
+        state=Event.WAITING_FOR_APPROVAL,
+    )
+    other_contract_zone = ContractZoneFactory()
+
+    response_data = json.loads(
+        get_streamed_content(
+            official_api_client, LIST_URL + "?start_year=2017&end_year=2018"
+        )
+    )
+
+    assert response_data["start_year"] == 2017
+    assert response_data["end_year"] == 2018
+    assert [zone["id"] for zone in response_data["results"]] == [
+        contract_zone.id,
+        other_contract_zone.id,
+    ]
+    series = response_data["results"][0]["series"]
+    assert len(series) == 24
+    assert series[2] == {
+        "year": 2017,
+        "month": 3,
+        "event_count": 2,
+        "estimated_attendee_count": event_1.estimated_attendee_count
+        + event_2.estimated_attendee_count,
+        "small_trash_bag_count": event_1.small_trash_bag_count
+        + event_2.small_trash_bag_count,
+        "large_trash_bag_count": event_1.large_trash_bag_count
+        + event_2.large_trash_bag_count,
+        "trash_picker_count": event_1.trash_picker_count + event_2.trash_picker_count,
+    }
+    assert series[16]["event_count"] == 1
+    assert series[16]["trash_picker_count"] == event_3.trash_picker_count
+    assert sum(values["event_count"] for values in series) == 3
+    assert all(
+        values["event_count"] == 0 for values in response_data["results"][1]["series"]
+    )
+
+
+def test_get_statistics_csv(contract_zone, official_api_client):
+    event = EventFactory(
+        contract_zone=contract_zone, start_time=make_aware(datetime(2018, 3, 3))
+    )
+
+    content = get_streamed_content(official_api_client, LIST_URL + "?format=csv")
+
+    rows = list(csv.DictReader(content.splitlines()))
+    assert len(rows) == 12
+    assert rows[2] == {
+        "contract_zone_id": str(contract_zone.id),
+        "contract_zone_name": contract_zone.name,
+        "year": "2018",
+        "month": "3",
+        "event_count": "1",
+        "estimated_attendee_count": str(event.estimated_attendee_count),
+        "small_trash_bag_count": str(event.small_trash_bag_count),
+        "large_trash_bag_count": str(event.large_trash_bag_count),
+        "trash_picker_count": str(event.trash_picker_count),
+    }
+
+
+@pytest.mark.parametrize(
+    "params", ["start_year=2019&end_year=2018", "start_year=2000&end_year=2030"]
+)
+def test_get_statistics_invalid_year_range(official_api_client, params):
+    get(official_api_client, LIST_URL + "?" + params, status_code=400)
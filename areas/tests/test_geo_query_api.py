@@ -6,12 +6,14 @@ from django.utils.timezone import localtime, make_aware, now
 from freezegun import freeze_time
 from rest_framework.reverse import reverse
 
-from common.tests.utils import check_translated_field_data_matches_object, get
+from common.tests.utils import check_translated_field_data_matches_object, get, post
 from events.factories import EventFactory
 
+from ..api import GEO_QUERY_BATCH_MAX_POINTS
 from ..factories import AddressFactory, ContractZoneFactory
 
 URL = reverse("v1:geo_query-list")
+BATCH_URL = reverse("v1:geo_query-batch")
 
 ADDRESS_KEYS = {"street", "distance", "number", "number_end", "letter", "location"}
 
@@ -73,6 +75,29 @@ def test_closest_address_check_data(api_client, addresses):
     check_address_data_matches_object(response_data["closest_address"], addresses[1])
 
 
+@pytest.mark.parametrize(
+    "address_coordinates, expected_index",
+    [
+        # both inside the search radius
+        (((24.0, 60.003), (24.0, 60.002)), 1),
+        # the first one is nearer by degrees but the second one by actual distance
+        (((24.0, 60.006), (24.011, 60.0)), 1),
+        # only the first one inside the search radius
+        (((24.0, 60.001), (25.0, 60.0)), 0),
+    ],
+)
+def test_closest_address_by_actual_distance(
+    api_client, address_coordinates, expected_index
+):
+    addresses = [AddressFactory(location=Point(c)) for c in address_coordinates]
+
+    response_data = get(api_client, get_url(60.0, 24.0))
+
+    check_address_data_matches_object(
+        response_data["closest_address"], addresses[expected_index]
+    )
+
+
 def test_no_matching_contract_zone(api_client, contract_zone):
     response_data = get(api_client, get_url(67, 24.5))
     assert response_data["contract_zone"] is None
@@ -148,3 +173,64 @@ def test_unavailable_dates(
     dates = response_data["contract_zone"]["unavailable_dates"][7:]
 
     assert dates == [date(2018, 12, d) for d in expected_unavailable_days]
+
+
+def test_batch_required_parameters(api_client):
+    post(api_client, BATCH_URL, {}, status_code=400)
+    post(api_client, BATCH_URL, {"points": []}, status_code=400)
+
+
+def test_batch_too_many_points(api_client):
+    points = [{"lat": 60, "lon": 24}] * (GEO_QUERY_BATCH_MAX_POINTS + 1)
+    post(api_client, BATCH_URL, {"points": points}, status_code=400)
+
+
+def test_batch_no_address_objects_in_database(api_client):
+    response_data = post(
+        api_client, BATCH_URL, {"points": [{"lat": 60.0, "lon": 24.0}]}, status_code=200
+    )
+    assert response_data["results"] == [
+        {"closest_address": None, "contract_zone": None}
+    ]
+
+
+@pytest.mark.parametrize("input_format", ("points", "multipoint"))
+def test_batch_results_in_input_order(
+    api_client, addresses, contract_zone, input_format
+):
+    coordinates = [(26.0, 60.0), (24.5, 60.5), (29.0, 60.0), (24.1, 60.0)]
+    if input_format == "points":
+        data = {"points": [{"lat": lat, "lon": lon} for lon, lat in coordinates]}
+    else:
+        data = {"type": "MultiPoint", "coordinates": coordinates}
+
+    response_data = post(api_client, BATCH_URL, data, status_code=200)
+
+    results = response_data["results"]
+    assert len(results) == 4
+    for result, expected_address in zip(
+        results, (addresses[1], addresses[0], addresses[2], addresses[0])
+    ):
+        check_address_data_matches_object(result["closest_address"], expected_address)
+    assert [
+        result["contract_zone"] and result["contract_zone"]["id"] for result in results
+    ] == [None, contract_zone.id, None, contract_zone.id]
+
+
+def test_batch_results_match_single_queries(api_client, addresses, contract_zone):
+    coordinates = [(26.0, 60.0), (24.5, 60.5)]
+
+    response_data = post(
+        api_client,
+        BATCH_URL,
+        {"points": [{"lat": lat, "lon": lon} for lon, lat in coordinates]},
+        status_code=200,
+    )
+
+    for (lon, lat), result in zip(coordinates, response_data["results"]):
+        single_result = get(api_client, get_url(lat, lon))
+        assert result["contract_zone"] == single_result["contract_zone"]
+        assert result["closest_address"].pop("distance") == pytest.approx(
+            single_result["closest_address"].pop("distance")
+        )
+        assert result["closest_address"] == single_result["closest_address"]
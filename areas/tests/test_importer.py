@@ -1,13 +1,25 @@
+import json
 import os
 
 import pytest
+import responses
 from django.contrib.gis.gdal import DataSource
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from responses import matchers
 
-from areas.importer.helsinki import HelsinkiImporter
+from areas.importer.helsinki import WFS_SOURCE, HelsinkiImporter
+from areas.models import ContractZone, ImportSourceState
 
 TEST_DATA = os.path.join(os.path.dirname(__file__), "data")
 
 
+@pytest.fixture
+def mocked_responses(monkeypatch):
+    monkeypatch.setattr("areas.importer.wfs.PAGE_SIZE", 2)
+    with responses.RequestsMock() as rsps:
+        yield rsps
+
+
 @pytest.fixture
 def ds_geojson_simple():
     return DataSource(f"{TEST_DATA}/geojson_simple.json")
@@ -35,3 +47,144 @@ def test_get_attribute_safe_returns_empty_string_if_none(ds_geojson_simple):
     feature = layer[0]
     result = HelsinkiImporter._get_attribute_safe(feature, "null")
     assert result == ""
+
+
+def get_contract_zone_feature(name, origin_id, x, contractor="Contractor"):
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "MultiPolygon",
+            "coordinates": [
+                [[[x, 60.0], [x + 0.1, 60.0], [x + 0.1, 60.1], [x, 60.1], [x, 60.0]]]
+            ],
+        },
+        "properties": {"id": origin_id, "nimi": name, "urakoitsija": contractor},
+    }
+
+
+def get_feature_collection(features):
+    return {"type": "FeatureCollection", "features": features}
+
+
+def test_process_contract_zones_is_incremental(django_assert_num_queries):
+    importer = HelsinkiImporter()
+    features = [
+        get_contract_zone_feature("Zone 1", "zone.1", 24.9),
+        get_contract_zone_feature("Zone 2", "zone.2", 25.0),
+        get_contract_zone_feature("Zone 3", "zone.3", 25.1),
+    ]
+
+    counts = importer._process_contract_zones(features)
+
+    assert counts == {"created": 3, "updated": 0, "unchanged": 0, "deactivated": 0}
+    assert ContractZone.objects.filter(active=True).count() == 3
+
+    # fetching the existing zones, the transaction savepoint and nothing else
+    with django_assert_num_queries(3):
+        counts = importer._process_contract_zones(features)
+    assert counts == {"created": 0, "updated": 0, "unchanged": 3, "deactivated": 0}
+
+    features = [
+        get_contract_zone_feature("Zone 1", "zone.1", 24.9, contractor="Other"),
+        get_contract_zone_feature("Zone 2", "zone.2", 25.05),
+        get_contract_zone_feature("Zone 4", "zone.4", 25.2),
+    ]
+    counts = importer._process_contract_zones(features)
+
+    assert counts == {"created": 1, "updated": 2, "unchanged": 0, "deactivated": 1}
+    assert ContractZone.objects.get(name="Zone 1").contractor == "Other"
+    assert ContractZone.objects.get(name="Zone 2").boundary.extent[0] == 25.05
+    assert ContractZone.objects.get(name="Zone 3").active is False
+    assert ContractZone.objects.get(name="Zone 4").simplified_boundaries
+
+
+def test_import_hash_does_not_depend_on_ring_start_point():
+    importer = HelsinkiImporter()
+    data = {"name": "Zone", "boundary": MultiPolygon(Polygon.from_bbox((0, 0, 1, 1)))}
+    shifted_ring = ((1, 0), (1, 1), (0, 1), (0, 0), (1, 0))
+    shifted_data = {"name": "Zone", "boundary": MultiPolygon(Polygon(shifted_ring))}
+
+    assert importer._get_import_hash(data) == importer._get_import_hash(shifted_data)
+
+
+def test_import_contract_zones_from_file(tmp_path):
+    path = tmp_path / "contract_zones.json"
+    path.write_text(
+        json.dumps(
+            get_feature_collection(
+                [get_contract_zone_feature("Zone 1", "zone.1", 24.9)]
+            )
+        )
+    )
+
+    counts = HelsinkiImporter().import_contract_zones(file_path=str(path))
+
+    assert counts == {"created": 1, "updated": 0, "unchanged": 0, "deactivated": 0}
+    contract_zone = ContractZone.objects.get()
+    assert contract_zone.name == "Zone 1"
+    assert contract_zone.origin_id == "zone.1"
+
+
+def test_import_contract_zones_from_wfs_with_paging(settings, mocked_responses):
+    features = [
+        get_contract_zone_feature(f"Zone {idx}", f"zone.{idx}", 24.9 + idx * 0.1)
+        for idx in range(3)
+    ]
+    for start_index, page_features in ((0, features[:2]), (2, features[2:])):
+        mocked_responses.get(
+            settings.HELSINKI_WFS_BASE_URL,
+            match=[
+                matchers.query_param_matcher(
+                    {"STARTINDEX": str(start_index), "COUNT": "2"}, strict_match=False
+                )
+            ],
+            json=get_feature_collection(page_features),
+            headers={"ETag": f'"page-{start_index}"'},
+        )
+
+    counts = HelsinkiImporter().import_contract_zones()
+
+    assert counts["created"] == 3
+    assert ImportSourceState.objects.get().validators == [
+        {"etag": '"page-0"', "last_modified": "", "feature_count": 2},
+        {"etag": '"page-2"', "last_modified": "", "feature_count": 1},
+    ]
+
+
+def test_import_contract_zones_from_wfs_skipped_when_not_modified(
+    settings, mocked_responses
+):
+    ImportSourceState.objects.create(
+        source=WFS_SOURCE,
+        validators=[{"etag": '"page-0"', "last_modified": "", "feature_count": 1}],
+    )
+    mocked_responses.get(
+        settings.HELSINKI_WFS_BASE_URL,
+        match=[matchers.header_matcher({"If-None-Match": '"page-0"'})],
+        status=304,
+    )
+
+    assert HelsinkiImporter().import_contract_zones() is None
+    assert not ContractZone.objects.exists()
+
+
+def test_import_contract_zones_from_wfs_when_modified(settings, mocked_responses):
+    ImportSourceState.objects.create(
+        source=WFS_SOURCE,
+        validators=[{"etag": '"old"', "last_modified": "", "feature_count": 1}],
+    )
+    mocked_responses.get(
+        settings.HELSINKI_WFS_BASE_URL,
+        match=[matchers.header_matcher({"If-None-Match": '"old"'})],
+        json=get_feature_collection(
+            [get_contract_zone_feature("Zone 1", "zone.1", 24.9)]
+        ),
+        headers={"ETag": '"new"'},
+    )
+
+    counts = HelsinkiImporter().import_contract_zones()
+
+    assert counts["created"] == 1
+    # the page fetched for the check is used for the import too
+    assert len(mocked_responses.calls) == 1
+    assert ImportSourceState.objects.get().validators[0]["etag"] == '"new"'
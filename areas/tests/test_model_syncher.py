@@ -0,0 +1,99 @@
+import pytest
+
+from areas.importer.utils import ModelSyncher
+from areas.models import ContractZone
+
+from ..factories import ContractZoneFactory
+
+
+def get_syncher(**kwargs):
+    return ModelSyncher(ContractZone.objects.all(), lambda x: x.origin_id, **kwargs)
+
+
+def mark_found(syncher, origin_ids):
+    for origin_id in origin_ids:
+        syncher.mark(syncher.get(origin_id))
+
+
+@pytest.fixture
+def contract_zones():
+    return [ContractZoneFactory(origin_id=str(i)) for i in range(10)]
+
+
+@pytest.mark.parametrize("bulk", (False, True))
+def test_finish_refuses_to_delete_more_than_40_percent(contract_zones, bulk):
+    syncher = get_syncher(bulk=bulk, deactivate_values={"active": False})
+    mark_found(syncher, ["0", "1", "2", "3"])
+
+    with pytest.raises(Exception, match="more than 40%"):
+        syncher.finish()
+
+    assert ContractZone.objects.filter(active=True).count() == 10
+
+
+@pytest.mark.parametrize("bulk", (False, True))
+def test_finish_deletes_more_than_40_percent_when_forced(contract_zones, bulk):
+    syncher = get_syncher(bulk=bulk)
+    mark_found(syncher, ["0", "1", "2", "3"])
+
+    deleted = syncher.finish(force=True)
+
+    assert len(deleted) == 6
+    assert set(ContractZone.objects.values_list("origin_id", flat=True)) == {
+        "0",
+        "1",
+        "2",
+        "3",
+    }
+
+
+@pytest.mark.parametrize("bulk", (False, True))
+def test_finish_deletes_up_to_40_percent(contract_zones, bulk):
+    syncher = get_syncher(bulk=bulk)
+    mark_found(syncher, ["0", "1", "2", "3", "4", "5"])
+
+    assert len(syncher.finish()) == 4
+    assert ContractZone.objects.count() == 6
+
+
+def test_finish_deletes_up_to_5_objects_regardless_of_percentage():
+    ContractZoneFactory.create_batch(5)
+
+    syncher = get_syncher(bulk=True)
+    assert len(syncher.finish()) == 5
+    assert not ContractZone.objects.exists()
+
+
+def test_finish_uses_delete_func(contract_zones):
+    deleted = []
+    syncher = get_syncher(delete_func=deleted.append)
+    mark_found(syncher, ["0", "1", "2", "3", "4", "5", "6", "7"])
+
+    syncher.finish()
+
+    assert [contract_zone.origin_id for contract_zone in deleted] == ["8", "9"]
+    assert ContractZone.objects.count() == 10
+
+
+def test_bulk_mode(contract_zones, django_assert_num_queries):
+    syncher = get_syncher(
+        bulk=True, update_fields=["name"], deactivate_values={"active": False}
+    )
+    mark_found(syncher, ["0", "1", "2", "3", "4", "5", "6"])
+    for origin_id in ("7", "8"):
+        contract_zone = syncher.get(origin_id)
+        contract_zone.name = f"New name {origin_id}"
+        syncher.mark(contract_zone, changed=True)
+    new_contract_zone = ContractZoneFactory.build(origin_id="10")
+    syncher.mark(new_contract_zone, changed=True)
+
+    # one query for creating, updating and deactivating each
+    with django_assert_num_queries(3):
+        deactivated = syncher.finish()
+
+    assert [contract_zone.origin_id for contract_zone in deactivated] == ["9"]
+    assert ContractZone.objects.get(origin_id="7").name == "New name 7"
+    assert ContractZone.objects.get(origin_id="8").name == "New name 8"
+    assert ContractZone.objects.get(origin_id="9").active is False
+    assert ContractZone.objects.get(origin_id="10").pk == new_contract_zone.pk
+    assert ContractZone.objects.filter(active=True).count() == 10
@@ -0,0 +1,107 @@
+import pytest
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+
+from common.models import CacheVersion
+
+from ..factories import ContractZoneFactory
+from ..models import PROJECTION_SRID, ContractZone
+from ..spatial_index import (
+    VERSION_KEY,
+    ContractZoneIndex,
+    bump_contract_zone_index_version,
+)
+
+
+def get_square(x, y, size=1):
+    return MultiPolygon(
+        Polygon(((x, y), (x + size, y), (x + size, y + size), (x, y + size), (x, y)))
+    )
+
+
+@pytest.fixture
+def index():
+    return ContractZoneIndex()
+
+
+@pytest.fixture
+def contract_zones():
+    return [
+        ContractZoneFactory(boundary=get_square(24 + i % 5, 60 + i // 5))
+        for i in range(20)
+    ]
+
+
+def test_lookups_match_database(index, contract_zones):
+    for x in (23.5, 24.5, 26.0, 28.9, 30.5):
+        for y in (59.5, 60.5, 62.0, 63.9, 65.5):
+            point = Point(x, y)
+            assert index.get_by_location(point) == ContractZone.objects.get_by_location(
+                point
+            )
+
+
+def test_inactive_zones_are_skipped(index, contract_zones):
+    point = Point(24.5, 60.5)
+    contract_zones[0].active = False
+    contract_zones[0].save()
+
+    assert index.get_by_location(point) == contract_zones[0]
+    assert index.get_active_by_location(point) is None
+
+
+def test_lookups_handle_points_without_srid_and_in_other_projections(
+    index, contract_zones
+):
+    point = Point(24.5, 60.5)
+    assert point.srid is None
+    projected_point = Point(24.5, 60.5, srid=PROJECTION_SRID).transform(
+        3857, clone=True
+    )
+
+    assert index.get_by_location(point) == contract_zones[0]
+    assert index.get_by_location(projected_point) == contract_zones[0]
+    assert index.get_active_by_locations([point, projected_point]) == [
+        contract_zones[0],
+        contract_zones[0],
+    ]
+
+
+def test_lookups_only_fetch_the_version(
+    index, contract_zones, django_assert_num_queries
+):
+    index.get_active_by_location(Point(24.5, 60.5))
+
+    with django_assert_num_queries(1):
+        assert index.get_active_by_location(Point(25.5, 61.5)) == contract_zones[6]
+
+    with django_assert_num_queries(1):
+        assert index.get_active_by_locations(
+            [Point(24.5, 60.5), Point(25.5, 61.5), Point(40.5, 60.5)]
+        ) == [contract_zones[0], contract_zones[6], None]
+
+
+def test_index_is_rebuilt_when_version_changes(index, contract_zones):
+    point = Point(40.5, 60.5)
+    assert index.get_active_by_location(point) is None
+
+    ContractZone.objects.filter(pk=contract_zones[0].pk).update(
+        boundary=get_square(40, 60)
+    )
+    assert index.get_active_by_location(point) is None
+
+    bump_contract_zone_index_version()
+    assert index.get_active_by_location(point) == contract_zones[0]
+
+
+def test_index_version_is_shared_through_the_database(index, contract_zones):
+    point = Point(40.5, 60.5)
+    assert index.get_active_by_location(point) is None
+
+    # e.g. the importer running in another process with its own cache
+    ContractZone.objects.filter(pk=contract_zones[0].pk).update(
+        boundary=get_square(40, 60)
+    )
+    CacheVersion.objects.update_or_create(
+        key=VERSION_KEY, defaults={"version": "other process"}
+    )
+    assert index.get_active_by_location(point) == contract_zones[0]
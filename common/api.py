@@ -1,8 +1,18 @@
+import base64
+import binascii
+import csv
+import json
 from copy import deepcopy
 
 import pytz
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import models
-from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
+from rest_framework import pagination, renderers, serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 
 class UTCDateTimeField(serializers.DateTimeField):
@@ -16,3 +26,140 @@ class UTCModelSerializer(serializers.ModelSerializer):
         serializers.ModelSerializer.serializer_field_mapping
     )
     serializer_field_mapping[models.DateTimeField] = UTCDateTimeField
+
+
+class Echo:
+    """File-like object that returns written values, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """
+    Renders a list of dicts, or a single dict such as an error response, as CSV
+
+    Large responses should rather be streamed, see Echo.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+        writer = csv.writer(Echo())
+        lines = [writer.writerow(fieldnames)]
+        lines.extend(
+            writer.writerow([row.get(key) for key in fieldnames]) for row in rows
+        )
+        return "".join(lines).encode(self.charset)
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Paginates by the ordering values of the last item of the previous page
+
+    Instead of an OFFSET, every page is fetched with a filter on the position the
+    previous page ended, so the cost of a page does not depend on how deep it is, and
+    items inserted meanwhile do not shift the pages. The last ordering field must be
+    unique. No count is calculated, and only forward paging is supported.
+    """
+
+    ordering = ("id",)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+    page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = _("Invalid cursor")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fields = [queryset.model._meta.get_field(name) for name in self.ordering]
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self._get_position_filter(position))
+
+        page_size = self.get_page_size(request)
+        results = list(queryset[: page_size + 1])
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_position = [
+                getattr(results[-1], field.attname) for field in self.fields
+            ]
+        else:
+            self.next_position = None
+
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def encode_cursor(self, position):
+        values = [
+            value.isoformat() if hasattr(value, "isoformat") else value
+            for value in position
+        ]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (
+            binascii.Error,
+            UnicodeDecodeError,
+            ValueError,
+            TypeError,
+            DjangoValidationError,
+        ) as e:
+            raise NotFound(self.invalid_cursor_message) from e
+
+    def _get_position_filter(self, position):
+        """Return a filter for items after the given position in the ordering"""
+        position_filter = models.Q()
+        for index in range(len(self.fields)):
+            equal = {
+                field.attname: value
+                for field, value in zip(self.fields[:index], position[:index])
+            }
+            after = {f"{self.fields[index].attname}__gt": position[index]}
+            position_filter |= models.Q(**equal, **after)
+        return position_filter
@@ -0,0 +1,57 @@
+from functools import partial
+from uuid import uuid4
+
+from django.db import transaction
+
+from common.models import CacheVersion
+
+# Version of data that has never been changed
+INITIAL_VERSION = ""
+
+
+def get_cache_version(key):
+    """Return the current version of the data of the given key"""
+    return get_cache_versions(key)[key]
+
+
+def get_cache_versions(*keys):
+    """Return a dict mapping the given keys to the current versions of their data"""
+    versions = dict(
+        CacheVersion.objects.filter(key__in=keys).values_list("key", "version")
+    )
+    return {key: versions.get(key, INITIAL_VERSION) for key in keys}
+
+
+def bump_cache_versions(*keys):
+    """
+    Give the data of the given keys new versions
+
+    The versions are saved in the current transaction, so other processes start to use
+    them at the same time as they see the changed data. Versions are random, so that
+    one saved by a rolled back transaction is never used again, and the rows are
+    written in key order to avoid deadlocks.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(key=key, version=uuid4().hex) for key in keys],
+        update_conflicts=True,
+        unique_fields=["key"],
+        update_fields=["version"],
+    )
+
+
+def bump_cache_versions_on_commit(*keys):
+    """
+    Give the data of the given keys new versions after the current transaction
+
+    Unlike bump_cache_versions(), this does not hold the version rows locked until the
+    end of the current transaction, so it suits write paths where that would
+    serialize otherwise independent transactions. The versions are bumped in their
+    own short transaction after the commit, so for that short while the old versions
+    can still be used.
+    """
+    if keys:
+        transaction.on_commit(partial(bump_cache_versions, *keys))
@@ -0,0 +1,47 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class LoadedValuesMixin:
+    """
+    Model mixin storing the field values an object had when it was loaded or saved
+
+    Lets receivers and save() tell which fields have changed.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_loaded_value(self, field_name):
+        """Return the value the given field had when the object was loaded or saved"""
+        return getattr(self, "_loaded_values", {}).get(field_name)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+
+class CacheVersion(models.Model):
+    """
+    Current version of data that processes cache locally
+
+    Stored in the database, so that a change made by any process, e.g. a management
+    command, is seen by every other process regardless of the cache backend. See
+    common.cache_versions.
+    """
+
+    key = models.CharField(verbose_name=_("key"), max_length=255, primary_key=True)
+    version = models.CharField(verbose_name=_("version"), max_length=32)
+
+    class Meta:
+        verbose_name = _("cache version")
+        verbose_name_plural = _("cache versions")
+
+    def __str__(self):
+        return f"{self.key}: {self.version}"
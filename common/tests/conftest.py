@@ -1,5 +1,6 @@
 import factory.random
 import pytest
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 from freezegun import freeze_time
 from rest_framework.test import APIClient
@@ -33,6 +34,11 @@ def autouse_django_db(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
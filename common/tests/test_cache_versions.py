@@ -0,0 +1,50 @@
+import pytest
+from django.db import transaction
+
+from common.cache_versions import (
+    INITIAL_VERSION,
+    bump_cache_versions,
+    bump_cache_versions_on_commit,
+    get_cache_version,
+    get_cache_versions,
+)
+
+
+def test_initial_cache_version():
+    assert get_cache_version("foo") == INITIAL_VERSION
+
+
+def test_bump_cache_versions():
+    bump_cache_versions("foo", "bar")
+    versions = get_cache_versions("foo", "bar", "baz")
+
+    assert versions["foo"] != INITIAL_VERSION
+    assert versions["bar"] not in (INITIAL_VERSION, versions["foo"])
+    assert versions["baz"] == INITIAL_VERSION
+
+    bump_cache_versions("foo")
+
+    assert get_cache_version("foo") != versions["foo"]
+    assert get_cache_version("bar") == versions["bar"]
+
+
+def test_cache_version_of_rolled_back_transaction_is_not_used():
+    bump_cache_versions("foo")
+    version = get_cache_version("foo")
+
+    with pytest.raises(RuntimeError), transaction.atomic():
+        bump_cache_versions("foo")
+        rolled_back_version = get_cache_version("foo")
+        raise RuntimeError
+
+    assert get_cache_version("foo") == version
+    bump_cache_versions("foo")
+    assert get_cache_version("foo") not in (version, rolled_back_version)
+
+
+def test_bump_cache_versions_on_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        bump_cache_versions_on_commit("foo")
+        assert get_cache_version("foo") == INITIAL_VERSION
+
+    assert get_cache_version("foo") != INITIAL_VERSION
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+
+from common.utils import VacationCalendar, vacation_calendar
+
+
+@pytest.mark.parametrize(
+    "day, expected_group",
+    [
+        (date(2018, 12, 10), (date(2018, 12, 10), date(2018, 12, 10))),  # Monday
+        (date(2018, 12, 14), (date(2018, 12, 14), date(2018, 12, 16))),  # Friday
+        (date(2018, 12, 16), (date(2018, 12, 14), date(2018, 12, 16))),  # Sunday
+        (date(2018, 12, 6), (date(2018, 12, 5), date(2018, 12, 6))),  # holiday
+        (date(2018, 12, 24), (date(2018, 12, 21), date(2018, 12, 26))),  # Christmas
+    ],
+)
+def test_vacation_calendar_get_group(day, expected_group):
+    assert vacation_calendar.get_group(day) == expected_group
+
+
+def test_vacation_calendar_business_days():
+    # 2018-12-22 = Saturday, 24-26 are holidays
+    assert vacation_calendar.get_previous_business_day(date(2018, 12, 25)) == date(
+        2018, 12, 21
+    )
+    assert vacation_calendar.get_next_business_day(date(2018, 12, 22)) == date(
+        2018, 12, 27
+    )
+    assert vacation_calendar.get_previous_business_day(date(2018, 12, 27)) == date(
+        2018, 12, 27
+    )
+    assert vacation_calendar.get_next_business_day(date(2018, 12, 27)) == date(
+        2018, 12, 27
+    )
+
+
+def test_vacation_calendar_is_extended_when_needed():
+    calendar = VacationCalendar()
+
+    # 2018-01-14 is the frozen today
+    assert calendar.get_group(date(2030, 1, 1)) == (
+        date(2029, 12, 31),
+        date(2030, 1, 1),
+    )
+    assert calendar.get_group(date(2001, 12, 31)) == (
+        date(2001, 12, 31),
+        date(2002, 1, 1),
+    )
+
+
+def test_vacation_calendar_get_range_groups():
+    calendar = VacationCalendar()
+
+    # 2018-12-22 = Saturday, 24-26 are holidays
+    days, group_starts = calendar.get_range_groups(
+        date(2018, 12, 21), date(2018, 12, 27)
+    )
+
+    assert days == [date(2018, 12, day) for day in range(21, 28)]
+    assert group_starts == [date(2018, 12, 21)] * 6 + [date(2018, 12, 27)]
+    assert calendar.get_range_groups(date(2018, 12, 21), date(2018, 12, 27)) == (
+        days,
+        group_starts,
+    )
+
+
+def test_vacation_calendar_get_range_groups_outside_window():
+    calendar = VacationCalendar()
+
+    # 2018-01-14 is the frozen today
+    days, group_starts = calendar.get_range_groups(date(2030, 12, 31), date(2031, 1, 1))
+
+    assert days == [date(2030, 12, 31), date(2031, 1, 1)]
+    assert group_starts == [date(2030, 12, 31)] * 2
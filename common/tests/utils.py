@@ -1,3 +1,6 @@
+from django.db import connection
+
+
 def get(api_client, url, status_code=200):
     return _execute_request(api_client, "get", url, status_code)
 
@@ -43,3 +46,13 @@ def assert_objects_in_results(objects, results):
     assert object_ids == result_ids, (
         f"Expected {object_ids} does not match results {result_ids}"
     )
+
+
+def get_advisory_locks():
+    """Return a set of the (key 1, key 2) advisory locks held by this connection"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT classid, objid FROM pg_locks"
+            " WHERE locktype = 'advisory' AND pid = pg_backend_pid()"
+        )
+        return set(cursor.fetchall())
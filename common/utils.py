@@ -1,8 +1,11 @@
-from datetime import timedelta
+import threading
+from array import array
+from datetime import date as date_type
+from datetime import datetime, time, timedelta
 
 import holidays
 from django.core import mail
-from django.utils.timezone import localtime, now
+from django.utils.timezone import is_naive, localtime, make_aware, now
 
 ONE_DAY = timedelta(days=1)
 SATURDAY = 6
@@ -14,6 +17,25 @@ def get_today():
     return localtime(now()).date()
 
 
+def get_local_date(value):
+    """
+    Return the local date of the given datetime
+
+    Dates are returned as is, and naive datetimes are interpreted in the current time
+    zone the same way Django does when saving them.
+    """
+    if not isinstance(value, datetime):
+        return value
+    if is_naive(value):
+        value = make_aware(value)
+    return localtime(value).date()
+
+
+def get_day_start(date):
+    """Return the aware datetime of the beginning of the given local date"""
+    return make_aware(datetime.combine(date, time()))
+
+
 def date_range(start, end):
     current = start
     while current <= end:
@@ -25,6 +47,127 @@ def is_vacation_day(date):
     return date.isoweekday() in (SATURDAY, SUNDAY) or date in HOLIDAYS_FINLAND
 
 
+class VacationCalendar:
+    """
+    Precomputed calendar of vacation day groups
+
+    For every day of the covered years the calendar stores the ordinals of the first
+    and the last day of the "vacation day group" the day belongs to (see
+    areas.models.get_affected_dates), so that the group as well as the closest
+    business days can be looked up in O(1) instead of checking the days one by one.
+
+    The calendar covers a window of years around the current year, and it is
+    extended automatically when a date outside the window is requested.
+
+    The holidays come from the holidays package and cannot change while the process
+    is running, so the calendar is kept in memory instead of in the database.
+    """
+
+    YEARS_BEFORE = 2
+    YEARS_AFTER = 5
+    MAX_MEMOIZED_RANGES = 32
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._range_groups = {}
+
+    def get_group(self, date):
+        """Return the first and the last date of the given date's vacation day group"""
+        first_ordinal, group_starts, group_ends = self._get_data(date)
+        index = date.toordinal() - first_ordinal
+        return (
+            date_type.fromordinal(group_starts[index]),
+            date_type.fromordinal(group_ends[index]),
+        )
+
+    def get_previous_business_day(self, date):
+        """Return the given date if it is a business day, else the preceding one"""
+        return self.get_group(date)[0]
+
+    def get_next_business_day(self, date):
+        """Return the given date if it is a business day, else the following one"""
+        group_start, group_end = self.get_group(date)
+        if group_start == date:
+            return date
+        return group_end + ONE_DAY
+
+    def get_range_groups(self, first_day, last_day):
+        """
+        Return a list of the dates of the given range and a list of the first dates of
+        their vacation day groups
+
+        The lists are sliced from the precomputed arrays and memoized per range, as
+        the availability queries of a day all use the same range.
+        """
+        key = (first_day, last_day)
+        range_groups = self._range_groups.get(key)
+        if range_groups is None:
+            # extending the calendar for the last day keeps the first day covered
+            self._get_data(first_day)
+            first_ordinal, group_starts, _group_ends = self._get_data(last_day)
+            start_index = first_day.toordinal() - first_ordinal
+            end_index = last_day.toordinal() - first_ordinal + 1
+            range_groups = (
+                list(date_range(first_day, last_day)),
+                [
+                    date_type.fromordinal(ordinal)
+                    for ordinal in group_starts[start_index:end_index]
+                ],
+            )
+            if len(self._range_groups) >= self.MAX_MEMOIZED_RANGES:
+                self._range_groups = {}
+            self._range_groups[key] = range_groups
+        return range_groups
+
+    def _get_data(self, date):
+        data = self._data
+        if data is None or not (data[0] <= date.toordinal() < data[0] + len(data[1])):
+            with self._lock:
+                data = self._data
+                if data is None:
+                    year = get_today().year
+                    first_year = min(year - self.YEARS_BEFORE, date.year)
+                    last_year = max(year + self.YEARS_AFTER, date.year)
+                else:
+                    first_year = min(date_type.fromordinal(data[0]).year, date.year)
+                    last_year = max(
+                        date_type.fromordinal(data[0] + len(data[1]) - 1).year,
+                        date.year,
+                    )
+                data = self._data = self._build(first_year, last_year)
+        return data
+
+    @staticmethod
+    def _build(first_year, last_year):
+        first_day = date_type(first_year, 1, 1)
+        last_day = date_type(last_year, 12, 31)
+        days = list(date_range(first_day, last_day))
+
+        group_starts = array("l", (0 for _ in days))
+        group_start = first_day
+        while is_vacation_day(group_start):
+            group_start -= ONE_DAY
+        for index, day in enumerate(days):
+            if not is_vacation_day(day):
+                group_start = day
+            group_starts[index] = group_start.toordinal()
+
+        group_ends = array("l", (0 for _ in days))
+        group_end = last_day
+        while is_vacation_day(group_end + ONE_DAY):
+            group_end += ONE_DAY
+        for index in range(len(days) - 1, -1, -1):
+            if index + 1 < len(days) and not is_vacation_day(days[index + 1]):
+                group_end = days[index]
+            group_ends[index] = group_end.toordinal()
+
+        return first_day.toordinal(), group_starts, group_ends
+
+
+vacation_calendar = VacationCalendar()
+
+
 def assert_to_addresses(*expected_to_addresses, mails=None):
     if mails is None:
         mails = mail.outbox
@@ -1,16 +1,18 @@
 from django import forms
 from django.contrib import admin
 from django.contrib.gis.admin import GISModelAdmin
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from django_ilmoitin.admin import NotificationTemplateAdmin, NotificationTemplateForm
 from django_ilmoitin.models import NotificationTemplate
 from jinja2 import StrictUndefined
 from jinja2.sandbox import SandboxedEnvironment
 
+from areas.availability import lock_vacation_day_groups
 from common.widgets import HaravaOSMWidget
 
 from .dummy_context import dummy_context
-from .models import Event
+from .models import Event, NotificationJob
 
 
 class ValidatedNotificationTemplateForm(NotificationTemplateForm):
@@ -65,3 +67,29 @@ class EventAdmin(GISModelAdmin):
         "modified_at",
     )
     readonly_fields = ("contract_zone",)
+
+    def delete_queryset(self, request, queryset):
+        # bulk deletion bypasses Event.delete(), so the vacation day groups of all the
+        # events are locked here before deleting any of them
+        with transaction.atomic():
+            lock_vacation_day_groups(
+                day_load_range
+                for event in queryset
+                for day_load_range in event.get_day_load_ranges()
+            )
+            queryset.delete()
+
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ("event", "type", "created_at", "attempts", "last_error")
+    list_filter = ("type",)
+    readonly_fields = ("event", "type", "created_at", "attempts", "last_error")
+    actions = ("retry",)
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description=_("Retry sending the selected notifications"))
+    def retry(self, request, queryset):
+        queryset.update(attempts=0)
@@ -1,16 +1,21 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Any
 
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.utils.timezone import localtime
 from django.utils.translation import gettext_lazy as _
 from django_filters import rest_framework as filters
 from rest_framework import serializers, viewsets
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
 
+from areas.availability import lock_vacation_day_groups
 from areas.models import ContractZone
-from common.api import UTCModelSerializer
+from areas.spatial_index import contract_zone_index
+from common.api import KeysetPagination, UTCModelSerializer
+from common.utils import get_local_date
 from events.models import ERROR_MSG_NO_CONTRACT_ZONE, Event
 from events.permissions import (
     AllowPatch,
@@ -87,9 +92,7 @@ class EventSerializer(UTCModelSerializer):
         """
         location = data.get("location")
         if location:
-            data["contract_zone"] = ContractZone.objects.get_active_by_location(
-                location
-            )
+            data["contract_zone"] = contract_zone_index.get_active_by_location(location)
             if not data["contract_zone"]:
                 raise serializers.ValidationError(
                     {"location": ERROR_MSG_NO_CONTRACT_ZONE}
@@ -97,15 +100,71 @@ class EventSerializer(UTCModelSerializer):
 
             # Only the start date determines whether the submission is allowed.
             start_date = localtime(start_time or self.instance.start_time).date()
-            zone_unavailable_dates = data["contract_zone"].get_unavailable_dates(
-                exclude_event=self.instance
-            )
-            if start_date in zone_unavailable_dates:
-                raise serializers.ValidationError(
-                    _("Unavailable dates: {}".format([start_date]))
-                )
+            self._check_availability(data["contract_zone"], start_date)
         return data
 
+    def _check_availability(
+        self, contract_zone: ContractZone, start_date: date, use_cache: bool = True
+    ) -> None:
+        """Check that an event can start on the given date in the given zone.
+
+        :param contract_zone: Contract zone of the event.
+        :param start_date: Local start date of the event.
+        :param use_cache: Whether cached unavailable dates may be used.
+        """
+        zone_unavailable_dates = contract_zone.get_unavailable_dates(
+            exclude_event=self.instance, use_cache=use_cache
+        )
+        if start_date in zone_unavailable_dates:
+            raise serializers.ValidationError(
+                _("Unavailable dates: {}".format([start_date]))
+            )
+
+    def _lock_and_recheck_availability(self, validated_data: dict[str, Any]) -> None:
+        """Lock the event's vacation day groups and check availability again.
+
+        Validation uses cached data and does not lock anything, so concurrent
+        submissions for the same zone and day could all pass it. The groups of the
+        zone the event touches are locked until the end of the transaction saving the
+        event, and the start date is rechecked from up to date data, so that
+        EVENT_MAXIMUM_COUNT_PER_CONTRACT_ZONE holds under concurrent submissions.
+
+        When an event is modified, the groups of its old zone and dates are locked
+        at the same time, in the same order as Event.save() locks them.
+
+        :param validated_data: Validated serializer data.
+        """
+        contract_zone = validated_data.get("contract_zone")
+        if not contract_zone:
+            return
+
+        start_date = get_local_date(
+            validated_data.get("start_time") or self.instance.start_time
+        )
+        end_date = get_local_date(
+            validated_data.get("end_time") or self.instance.end_time
+        )
+        ranges = {(contract_zone.pk, start_date, max(start_date, end_date))}
+        if self.instance:
+            ranges |= self.instance.get_day_load_ranges()
+        lock_vacation_day_groups(ranges)
+        try:
+            self._check_availability(contract_zone, start_date, use_cache=False)
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: e.detail}
+            ) from e
+
+    @transaction.atomic
+    def create(self, validated_data: dict[str, Any]) -> Event:
+        self._lock_and_recheck_availability(validated_data)
+        return super().create(validated_data)
+
+    @transaction.atomic
+    def update(self, instance: Event, validated_data: dict[str, Any]) -> Event:
+        self._lock_and_recheck_availability(validated_data)
+        return super().update(instance, validated_data)
+
     def validate(self, data: dict[str, Any]) -> dict[str, Any]:
         """Validate the full serializer payload.
 
@@ -138,6 +197,10 @@ class EventFilter(filters.FilterSet):
         ]
 
 
+class EventCursorPagination(KeysetPagination):
+    ordering = ("start_time", "id")
+
+
 class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
@@ -150,6 +213,17 @@ class EventViewSet(viewsets.ModelViewSet):
         | ReadOnly
     ]
 
+    @property
+    def paginator(self):
+        """Use cursor pagination when requested with ?pagination=cursor"""
+        if (
+            not hasattr(self, "_paginator")
+            and self.request is not None
+            and self.request.query_params.get("pagination") == "cursor"
+        ):
+            self._paginator = EventCursorPagination()
+        return super().paginator
+
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update") or (
             self.request.user and self.request.user.is_authenticated
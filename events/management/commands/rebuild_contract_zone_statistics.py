@@ -0,0 +1,16 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from events.statistics import rebuild_statistics
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the contract zone statistics rollup from the events"
+
+    def handle(self, *args, **options):
+        logger.info("Rebuilding contract zone statistics")
+        row_count = rebuild_statistics()
+        logger.info(f"Contract zone statistics rebuilt, {row_count} row(s) created")
@@ -0,0 +1,16 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from events.zone_day_loads import rebuild_zone_day_loads
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per contract zone event counts of vacation day groups"
+
+    def handle(self, *args, **options):
+        logger.info("Rebuilding zone day loads")
+        row_count = rebuild_zone_day_loads()
+        logger.info(f"Zone day loads rebuilt, {row_count} row(s) created")
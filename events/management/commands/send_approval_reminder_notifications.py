@@ -22,9 +22,10 @@ from datetime import timedelta
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.utils.timezone import localtime, now
+from django.db.models import BooleanField, Case, ExpressionWrapper, F, Q, Value, When
+from django.utils.timezone import now
 
-from common.utils import ONE_DAY, get_today, is_vacation_day
+from common.utils import ONE_DAY, get_day_start, get_today, vacation_calendar
 from events.models import Event
 from events.notifications import send_pending_approval_reminder_notification
 
@@ -39,109 +40,128 @@ class Command(BaseCommand):
         today = get_today()
         reminders_sent = 0
 
-        # Query only pending events that haven't started yet
-        pending_events = Event.objects.filter(
-            state=Event.WAITING_FOR_APPROVAL,
-            start_time__gt=now(),
+        creation_due = self._get_creation_reminder_filter(today)
+        deadline_due = self._get_deadline_reminder_filter(today)
+
+        # Query only pending events that haven't started yet and have a reminder due
+        # today, so the cost depends on the number of due reminders rather than on
+        # the number of pending events
+        due_events = (
+            Event.objects.filter(
+                creation_due | deadline_due,
+                state=Event.WAITING_FOR_APPROVAL,
+                start_time__gt=now(),
+            )
+            .annotate(
+                creation_due=ExpressionWrapper(
+                    creation_due, output_field=BooleanField()
+                ),
+                deadline_due=ExpressionWrapper(
+                    deadline_due, output_field=BooleanField()
+                ),
+            )
+            .select_related("contract_zone")
         )
 
-        for event in pending_events:
-            creation_due = self._is_creation_reminder_due(event, today)
-            deadline_due = self._is_deadline_reminder_due(event, today)
-
-            # If neither trigger is due (or already sent), skip
-            if not (creation_due or deadline_due):
-                continue
-
-            sent = send_pending_approval_reminder_notification(event)
-            if not sent:
-                # Leave timestamps untouched
-                # so a later run can try again if data is fixed
-                continue
-
-            timestamp = now()
-            update_fields = []
-            if creation_due:
-                event.approval_creation_reminder_sent_at = timestamp
-                update_fields.append("approval_creation_reminder_sent_at")
-            if deadline_due:
-                event.approval_deadline_reminder_sent_at = timestamp
-                update_fields.append("approval_deadline_reminder_sent_at")
-
-            if update_fields:
-                event.save(update_fields=update_fields)
-
-            reminders_sent += 1
-            logger.info(
-                f"Sent approval reminder for event '{event.name}' (ID: {event.pk})"
-            )
+        creation_sent_ids = []
+        deadline_sent_ids = []
+        try:
+            for event in due_events:
+                sent = send_pending_approval_reminder_notification(event)
+                if not sent:
+                    # Leave timestamps untouched
+                    # so a later run can try again if data is fixed
+                    continue
+
+                if event.creation_due:
+                    creation_sent_ids.append(event.pk)
+                if event.deadline_due:
+                    deadline_sent_ids.append(event.pk)
+
+                reminders_sent += 1
+                logger.info(
+                    f"Sent approval reminder for event '{event.name}' (ID: {event.pk})"
+                )
+        finally:
+            # record the sent reminders even if sending some other one failed
+            self._set_reminder_timestamps(creation_sent_ids, deadline_sent_ids)
 
         logger.info(
             f"Approval reminder check complete. Sent {reminders_sent} reminder(s)"
         )
 
-    def _is_creation_reminder_due(self, event, today):
-        """
-        Return True when the creation-based reminder should send today and has
-        not already been sent (timestamp is null).
-        """
-        reminder_day = self._calculate_creation_reminder_day(event)
-        if reminder_day is None or event.approval_creation_reminder_sent_at:
-            return False
-        return today == reminder_day
-
-    def _is_deadline_reminder_due(self, event, today):
+    def _get_creation_reminder_filter(self, today):
         """
-        Return True when the deadline-based reminder should send today and has
+        Return a filter for events whose creation-based reminder is due today and has
         not already been sent (timestamp is null).
-        """
-        reminder_day = self._calculate_deadline_reminder_day(event)
-        if reminder_day is None or event.approval_deadline_reminder_sent_at:
-            return False
-        return today == reminder_day
-
-    def _calculate_creation_reminder_day(self, event):
-        """
-        Calculate the day to send a creation-based reminder.
 
-        The reminder is scheduled for X days after the event was created.
-        If this falls on a vacation day (weekend or Finnish holiday), the reminder
-        is shifted to the NEXT business day. This ensures contractors have the
-        full waiting period before receiving the reminder.
+        The reminder is scheduled for X days after the event was created. If this
+        falls on a vacation day (weekend or Finnish holiday), the reminder is shifted
+        to the NEXT business day. This ensures contractors have the full waiting
+        period before receiving the reminder.
 
-        Returns None if this reminder type is disabled (configured as -1).
+        So the reminders due today are those scheduled for today or for the vacation
+        days right before it, and none are due on vacation days. The filter is an
+        index friendly range of creation times derived from the vacation calendar.
+        Matches nothing if this reminder type is disabled (configured as -1).
         """
         days_after = settings.APPROVAL_REMINDER_DAYS_AFTER_CREATION
-        if days_after < 0:
-            return None
-
-        reminder_day = localtime(event.created_at).date() + timedelta(days=days_after)
-
-        # Shift to next business day if reminder falls on vacation
-        while is_vacation_day(reminder_day):
-            reminder_day += ONE_DAY
-
-        return reminder_day
+        if days_after < 0 or vacation_calendar.get_next_business_day(today) != today:
+            return Q(pk__in=[])
+
+        previous_business_day = vacation_calendar.get_group(today - ONE_DAY)[0]
+        first_reminder_day = previous_business_day + ONE_DAY
+
+        return Q(
+            approval_creation_reminder_sent_at=None,
+            created_at__gte=get_day_start(
+                first_reminder_day - timedelta(days=days_after)
+            ),
+            created_at__lt=get_day_start(today + ONE_DAY - timedelta(days=days_after)),
+        )
 
-    def _calculate_deadline_reminder_day(self, event):
+    def _get_deadline_reminder_filter(self, today):
         """
-        Calculate the day to send a deadline-based reminder.
+        Return a filter for events whose deadline-based reminder is due today and has
+        not already been sent (timestamp is null).
 
-        The reminder is scheduled for Y days before the event starts.
-        If this falls on a vacation day (weekend or Finnish holiday), the reminder
-        is shifted to the PRECEDING business day. This ensures the reminder is
-        sent before the deadline passes.
+        The reminder is scheduled for Y days before the event starts. If this falls
+        on a vacation day (weekend or Finnish holiday), the reminder is shifted to the
+        PRECEDING business day. This ensures the reminder is sent before the deadline
+        passes.
 
-        Returns None if this reminder type is disabled (configured as -1).
+        So the reminders due today are those scheduled for today or for the vacation
+        days right after it, and none are due on vacation days. The filter is an index
+        friendly range of start times derived from the vacation calendar. Matches
+        nothing if this reminder type is disabled (configured as -1).
         """
         days_before = settings.APPROVAL_REMINDER_DAYS_BEFORE_EVENT
-        if days_before < 0:
-            return None
-
-        reminder_day = localtime(event.start_time).date() - timedelta(days=days_before)
-
-        # Shift to preceding business day if reminder falls on vacation
-        while is_vacation_day(reminder_day):
-            reminder_day -= ONE_DAY
+        group_start, group_end = vacation_calendar.get_group(today)
+        if days_before < 0 or group_start != today:
+            return Q(pk__in=[])
+
+        return Q(
+            approval_deadline_reminder_sent_at=None,
+            start_time__gte=get_day_start(today + timedelta(days=days_before)),
+            start_time__lt=get_day_start(
+                group_end + ONE_DAY + timedelta(days=days_before)
+            ),
+        )
 
-        return reminder_day
+    @staticmethod
+    def _set_reminder_timestamps(creation_sent_ids, deadline_sent_ids):
+        """Record the sent reminders of all the events with a single UPDATE"""
+        if not (creation_sent_ids or deadline_sent_ids):
+            return
+
+        timestamp = now()
+        Event.objects.filter(pk__in={*creation_sent_ids, *deadline_sent_ids}).update(
+            approval_creation_reminder_sent_at=Case(
+                When(pk__in=creation_sent_ids, then=Value(timestamp)),
+                default=F("approval_creation_reminder_sent_at"),
+            ),
+            approval_deadline_reminder_sent_at=Case(
+                When(pk__in=deadline_sent_ids, then=Value(timestamp)),
+                default=F("approval_deadline_reminder_sent_at"),
+            ),
+        )
@@ -5,7 +5,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils.timezone import localtime, now
 
-from common.utils import ONE_DAY, get_today, is_vacation_day
+from common.utils import get_today, vacation_calendar
 from events.models import Event
 from events.notifications import send_event_reminder_notification
 
@@ -20,11 +20,10 @@ class Command(BaseCommand):
         today = get_today()
 
         for event in Event.objects.filter(start_time__gt=now(), reminder_sent_at=None):
-            reminder_day = localtime(event.start_time).date() - timedelta(
-                days=settings.EVENT_REMINDER_DAYS_IN_ADVANCE
+            reminder_day = vacation_calendar.get_previous_business_day(
+                localtime(event.start_time).date()
+                - timedelta(days=settings.EVENT_REMINDER_DAYS_IN_ADVANCE)
             )
-            while is_vacation_day(reminder_day):
-                reminder_day -= ONE_DAY
 
             if today == reminder_day:
                 send_event_reminder_notification(event)
@@ -0,0 +1,16 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from events.notification_jobs import run_pending_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Send the pending notifications of created and approved events"
+
+    def handle(self, *args, **options):
+        logger.info("Sending pending notification jobs")
+        sent_count, job_count = run_pending_jobs()
+        logger.info(f"Notification jobs sent: {sent_count}/{job_count}")
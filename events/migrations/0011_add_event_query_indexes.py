@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0010_change_event_maintenance_location_optional"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["contract_zone", "start_time"], name="event_zone_start_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["state", "start_time"], name="event_state_start_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("is_anonymized", False)),
+                fields=["start_time"],
+                name="event_start_not_anon_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("is_anonymized", False)),
+                fields=["end_time"],
+                name="event_end_not_anon_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                condition=models.Q(("reminder_sent_at", None)),
+                fields=["start_time"],
+                name="event_reminder_pending_idx",
+            ),
+        ),
+    ]
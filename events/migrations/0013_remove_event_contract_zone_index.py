@@ -0,0 +1,22 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0012_notificationjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="event",
+            name="contract_zone",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="events",
+                to="areas.contractzone",
+                verbose_name="contract zone",
+            ),
+        ),
+    ]
@@ -1,13 +1,21 @@
 from django.conf import settings
 from django.contrib.gis.db import models
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
+from areas.availability import lock_vacation_day_groups
 from areas.models import ContractZone
+from areas.spatial_index import contract_zone_index
+from common.models import LoadedValuesMixin
+from common.utils import get_local_date
 from events.signals import event_approved
 
 ERROR_MSG_NO_CONTRACT_ZONE = _("Location must be inside a contract zone.")
 
+# Fields affecting the zone day loads of an event
+DAY_LOAD_FIELDS = ("contract_zone_id", "start_time", "end_time")
+
 
 class EventQuerySet(models.QuerySet):
     def filter_for_user(self, user):
@@ -19,7 +27,7 @@ class EventQuerySet(models.QuerySet):
             return self.filter(contract_zone__contractor_users=user)
 
 
-class Event(models.Model):
+class Event(LoadedValuesMixin, models.Model):
     WAITING_FOR_APPROVAL = "waiting_for_approval"
     APPROVED = "approved"
     STATES = (
@@ -80,6 +88,8 @@ class Event(models.Model):
         verbose_name=_("contract zone"),
         related_name="events",
         on_delete=models.PROTECT,
+        # covered by event_zone_start_time_idx
+        db_index=False,
     )
 
     reminder_sent_at = models.DateTimeField(
@@ -114,12 +124,58 @@ class Event(models.Model):
         verbose_name = _("event")
         verbose_name_plural = _("events")
         ordering = ("id",)
+        indexes = [
+            # availability, zone day loads and the contract_zone filter
+            models.Index(
+                fields=["contract_zone", "start_time"], name="event_zone_start_time_idx"
+            ),
+            # the state filter, the public event list and approval reminders
+            models.Index(fields=["state", "start_time"], name="event_state_start_idx"),
+            # time range filters of the event list, which never shows anonymized
+            # events, and the anonymization of ended events
+            models.Index(
+                fields=["start_time"],
+                condition=models.Q(is_anonymized=False),
+                name="event_start_not_anon_idx",
+            ),
+            models.Index(
+                fields=["end_time"],
+                condition=models.Q(is_anonymized=False),
+                name="event_end_not_anon_idx",
+            ),
+            # event reminders
+            models.Index(
+                fields=["start_time"],
+                condition=models.Q(reminder_sent_at=None),
+                name="event_reminder_pending_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def get_day_load_ranges(self):
+        """
+        Return a set of (contract zone ID, first date, last date) tuples of both the
+        event's current and previously saved contract zone and local dates
+        """
+        ranges = set()
+        for contract_zone_id, start_time, end_time in (
+            [self.get_loaded_value(field) for field in DAY_LOAD_FIELDS],
+            [getattr(self, field) for field in DAY_LOAD_FIELDS],
+        ):
+            if contract_zone_id and start_time and end_time:
+                ranges.add(
+                    (
+                        contract_zone_id,
+                        get_local_date(start_time),
+                        get_local_date(end_time),
+                    )
+                )
+        return ranges
+
     def clean(self):
-        contract_zone = ContractZone.objects.get_by_location(self.location)
+        contract_zone = contract_zone_index.get_by_location(self.location)
         if not contract_zone:
             raise ValidationError(
                 {"location": ERROR_MSG_NO_CONTRACT_ZONE}, code="no_contract_zone"
@@ -127,14 +183,66 @@ class Event(models.Model):
         self.contract_zone = contract_zone
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            # this is not optimal as it causes an extra hit to the db, but event
-            # modifications are so infrequent that we don't bother to build more complex
-            # logic for this
-            old_state = Event.objects.get(pk=self.pk).state
-
-            super().save(*args, **kwargs)
-            if old_state == Event.WAITING_FOR_APPROVAL and self.state == Event.APPROVED:
-                event_approved.send(self.__class__, instance=self)
-        else:
-            super().save(*args, **kwargs)
+        with transaction.atomic():
+            # the vacation day groups are locked before writing anything, the same way
+            # as when booking through the API, so that all changes to the same groups
+            # are serialized without deadlocks
+            lock_vacation_day_groups(self.get_day_load_ranges())
+
+            if self.pk:
+                # this is not optimal as it causes an extra hit to the db, but event
+                # modifications are so infrequent that we don't bother to build more
+                # complex logic for this
+                old_state = Event.objects.get(pk=self.pk).state
+
+                super().save(*args, **kwargs)
+                if (
+                    old_state == Event.WAITING_FOR_APPROVAL
+                    and self.state == Event.APPROVED
+                ):
+                    event_approved.send(self.__class__, instance=self)
+            else:
+                super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            lock_vacation_day_groups(self.get_day_load_ranges())
+            return super().delete(*args, **kwargs)
+
+
+class NotificationJob(models.Model):
+    """
+    Notifications of an event waiting to be sent
+
+    Jobs are created in the same transaction as the event change causing them, and
+    run by events.notification_jobs after the transaction has been committed, or by
+    the send_notification_jobs management command.
+    """
+
+    EVENT_CREATED = "event_created"
+    EVENT_APPROVED = "event_approved"
+    TYPES = (
+        (EVENT_CREATED, _("event created")),
+        (EVENT_APPROVED, _("event approved")),
+    )
+
+    event = models.ForeignKey(
+        Event,
+        verbose_name=_("event"),
+        related_name="notification_jobs",
+        on_delete=models.CASCADE,
+    )
+    type = models.CharField(verbose_name=_("type"), max_length=50, choices=TYPES)
+    created_at = models.DateTimeField(verbose_name=_("created at"), auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name=_("failed attempts"), default=0
+    )
+    last_error = models.TextField(verbose_name=_("last error"), blank=True)
+
+    class Meta:
+        verbose_name = _("notification job")
+        verbose_name_plural = _("notification jobs")
+        ordering = ("id",)
+
+    def __str__(self):
+        return f"{self.type} - {self.event_id}"
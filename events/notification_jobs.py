@@ -0,0 +1,109 @@
+import logging
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from events.models import NotificationJob
+from events.notifications import (
+    process_notification_queue,
+    queue_notifications_only,
+    send_event_approved_notification,
+    send_event_created_notification,
+    send_event_received_notification,
+)
+
+logger = logging.getLogger(__name__)
+
+# Jobs that have failed this many times are not retried by run_pending_jobs()
+MAX_ATTEMPTS = 5
+
+
+def enqueue_notification_job(event, job_type):
+    """
+    Create a notification job for the given event
+
+    The job is created in the current transaction, so it is saved only if the event
+    change causing it is. Unless disabled by the NOTIFICATION_JOBS_RUN_ON_COMMIT
+    setting, the job is run right after the transaction has been committed. Failed
+    jobs are retried by the send_notification_jobs management command.
+    """
+    job = NotificationJob.objects.create(event=event, type=job_type)
+    if settings.NOTIFICATION_JOBS_RUN_ON_COMMIT:
+        transaction.on_commit(partial(run_notification_job, job.pk), robust=True)
+    return job
+
+
+def run_notification_job(job_id, process_queue=True):
+    """
+    Send the notifications of the given job and delete it, or record the error
+
+    The job is locked while it is being run and jobs locked by someone else are
+    skipped, so its notifications are not sent twice when jobs are run concurrently.
+
+    Every recipient's message is only queued to django-mailer in the same transaction
+    as the job is deleted, so the messages of a job are queued exactly once even if
+    the job fails partway and is retried. django-mailer then delivers and retries the
+    queued messages one by one. The queue is processed after the transaction unless
+    process_queue is False. Returns whether the notifications were sent.
+    """
+    with transaction.atomic():
+        job = (
+            NotificationJob.objects.select_for_update(skip_locked=True, of=("self",))
+            .select_related("event__contract_zone")
+            .filter(pk=job_id)
+            .first()
+        )
+        if job is None:
+            return False
+
+        try:
+            with transaction.atomic(), queue_notifications_only():
+                _send_notifications(job)
+        except Exception as e:
+            logger.exception(f"Running notification job {job} failed")
+            job.attempts += 1
+            job.last_error = repr(e)
+            job.save(update_fields=("attempts", "last_error"))
+            if job.attempts >= MAX_ATTEMPTS:
+                logger.error(
+                    f"Notification job {job} failed {job.attempts} times and will "
+                    f"not be retried"
+                )
+            return False
+
+        job.delete()
+
+    if process_queue:
+        process_notification_queue()
+    return True
+
+
+def run_pending_jobs():
+    """
+    Run the notification jobs that have not failed too many times, oldest first
+
+    django-mailer's queue is processed once after all the jobs have been run. Returns
+    the number of jobs run successfully and the number of jobs tried.
+    """
+    job_ids = list(
+        NotificationJob.objects.filter(attempts__lt=MAX_ATTEMPTS).values_list(
+            "pk", flat=True
+        )
+    )
+    sent_count = sum(
+        run_notification_job(job_id, process_queue=False) for job_id in job_ids
+    )
+    if sent_count:
+        process_notification_queue()
+    return sent_count, len(job_ids)
+
+
+def _send_notifications(job):
+    if job.type == NotificationJob.EVENT_CREATED:
+        send_event_created_notification(job.event)
+        send_event_received_notification(job.event)
+    elif job.type == NotificationJob.EVENT_APPROVED:
+        send_event_approved_notification(job.event)
+    else:
+        raise ValueError(f"Unknown notification job type {job.type}")
@@ -0,0 +1,134 @@
+import threading
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.html import strip_tags
+from django_ilmoitin.models import NotificationTemplate, NotificationTemplateException
+from django_ilmoitin.utils import RenderedTemplate
+from jinja2 import StrictUndefined
+from jinja2.exceptions import TemplateError
+from jinja2.sandbox import SandboxedEnvironment
+from parler.utils.context import switch_language
+
+from common.cache_versions import bump_cache_versions, get_cache_version
+
+VERSION_KEY = "notification_templates"
+
+# Same settings as django_ilmoitin uses for rendering notifications
+jinja_env = SandboxedEnvironment(
+    trim_blocks=True, lstrip_blocks=True, undefined=StrictUndefined
+)
+
+
+def bump_notification_template_version():
+    """
+    Make every process recompile its notification templates on the next use
+
+    The version is stored in the database in the current transaction, so every
+    process sees it at the same time as the changed templates.
+    """
+    bump_cache_versions(VERSION_KEY)
+
+
+def get_notification_template_version():
+    """Return the current notification template version"""
+    return get_cache_version(VERSION_KEY)
+
+
+class CompiledNotificationTemplate:
+    """
+    Notification template in one language, compiled and ready to be rendered
+
+    Rendering works like django_ilmoitin's render_notification_template().
+    """
+
+    def __init__(self, template, language):
+        try:
+            with switch_language(template, language):
+                self.subject = jinja_env.from_string(template.subject)
+                self.body_html = jinja_env.from_string(template.body_html)
+                self.body_text = (
+                    jinja_env.from_string(template.body_text)
+                    if template.body_text
+                    else None
+                )
+        except TemplateError as e:
+            raise NotificationTemplateException(e) from e
+
+        self.admin_subject = template.admin_notification_subject
+        self.admin_text = template.admin_notification_text
+        self.admin_emails = (
+            [admin.email for admin in template.admins_to_notify.all()]
+            if self.admin_subject and self.admin_text
+            else []
+        )
+
+    def render(self, context):
+        try:
+            subject = self.subject.render(context)
+            body_html = self.body_html.render(context)
+            if self.body_text:
+                body_text = self.body_text.render(context)
+            else:
+                body_text = strip_tags(body_html)
+        except TemplateError as e:
+            raise NotificationTemplateException(e) from e
+
+        return RenderedTemplate(subject, body_html, body_text)
+
+
+class NotificationTemplateCache:
+    """
+    In-process cache of compiled notification templates by type and language
+
+    Templates change only when they are edited in the admin, so every process
+    fetches and compiles a template only once. The cached templates are dropped when
+    the version stored in the database has changed, which happens when templates,
+    their translations, their admins to notify or those admins' emails are changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._templates = {}
+
+    def get(self, notification_type, language):
+        """
+        Return the compiled template of the given type and language
+
+        Returns None if there is no template of the type or it has no translation
+        to use for the language.
+        """
+        version = get_notification_template_version()
+        key = (notification_type, language)
+
+        with self._lock:
+            if version != self._version:
+                self._templates = {}
+                self._version = version
+            if key in self._templates:
+                return self._templates[key]
+
+        compiled = self._compile(notification_type, language)
+
+        with self._lock:
+            if version == self._version:
+                self._templates[key] = compiled
+        return compiled
+
+    @staticmethod
+    def _compile(notification_type, language):
+        template = (
+            NotificationTemplate.objects.filter(type=notification_type)
+            .prefetch_related("translations")
+            .first()
+        )
+        if not template:
+            return None
+        try:
+            return CompiledNotificationTemplate(template, language)
+        except ObjectDoesNotExist:
+            # no translation to use for the language
+            return None
+
+
+notification_template_cache = NotificationTemplateCache()
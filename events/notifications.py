@@ -1,16 +1,25 @@
 import logging
+import threading
+from contextlib import contextmanager
 from enum import Enum
 
-from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
+from django_ilmoitin.models import NotificationTemplateException
 from django_ilmoitin.registry import notifications
-from django_ilmoitin.utils import send_notification
+from django_ilmoitin.utils import DEFAULT_LANGUAGE
+from mailer.engine import send_all
+from mailer.models import Message
 
-User = get_user_model()
+from events.notification_templates import notification_template_cache
+from users.models import get_official_emails
 
 logger = logging.getLogger(__name__)
 
+_queue_only = threading.local()
+
 
 def get_notification_base_context():
     """Get common context variables for all notifications"""
@@ -73,6 +82,93 @@ notifications.register(
 )
 
 
+def send_notifications(emails, notification_type, context, language=DEFAULT_LANGUAGE):
+    """
+    Send a notification of the given type to every given email address
+
+    Works like django_ilmoitin's send_notification() for each of the addresses, but
+    the template is rendered only once, every recipient gets their own message from
+    the same rendered content, the template's admins are notified once, and
+    django-mailer's queue is processed once after all the messages are queued, unless
+    called inside queue_notifications_only(). The compiled template comes from
+    notification_template_cache.
+    """
+    emails = list(emails)
+    if not emails:
+        return
+
+    logger.debug(
+        f'Trying to send notification "{notification_type}" to {len(emails)} '
+        "recipient(s)."
+    )
+
+    try:
+        template = notification_template_cache.get(notification_type, language)
+        if not template:
+            logger.warning(
+                f'No notification template created for "{notification_type}" event '
+                f'in language "{language}", not sending anything.'
+            )
+            return
+        subject, body_html, body_text = template.render(context)
+    except NotificationTemplateException as e:
+        logger.error(e, exc_info=True)
+        return
+
+    if not subject:
+        logger.warning(
+            f'Rendered notification "{notification_type}" has an empty subject, not '
+            "sending anything."
+        )
+        return
+
+    from_email = getattr(settings, "ILMOITIN_TRANSLATED_FROM_EMAIL", {}).get(
+        language, settings.DEFAULT_FROM_EMAIL
+    )
+    messages = []
+    for email in emails:
+        logger.info(f'Sending notification email to {email}: "{subject}"')
+        message = EmailMultiAlternatives(subject, body_text, from_email, [email])
+        if body_html:
+            message.attach_alternative(body_html, "text/html")
+        messages.append(message)
+
+    messages.extend(
+        EmailMultiAlternatives(
+            template.admin_subject, template.admin_text, from_email, [admin_email]
+        )
+        for admin_email in template.admin_emails
+    )
+
+    get_connection().send_messages(messages)
+
+    if not getattr(_queue_only, "active", False):
+        process_notification_queue()
+
+
+@contextmanager
+def queue_notifications_only():
+    """
+    Only queue the notifications sent in the block to django-mailer's queue
+
+    The queue is not processed until process_notification_queue() is called, so the
+    messages can be queued in the same transaction as something else, and they are
+    not sent if it is rolled back.
+    """
+    _queue_only.active = True
+    try:
+        yield
+    finally:
+        _queue_only.active = False
+
+
+def process_notification_queue():
+    """Send the messages in django-mailer's queue unless they are sent separately"""
+    if not getattr(settings, "ILMOITIN_QUEUE_NOTIFICATIONS", False):
+        Message.objects.retry_deferred()
+        send_all()
+
+
 def send_event_created_notification(event):
     _send_notifications_to_contractor_and_officials(
         event, NotificationType.EVENT_CREATED.value
@@ -83,18 +179,16 @@ def send_event_received_notification(event):
     """Send event received confirmation to the organizer"""
     context = get_notification_base_context()
     context["event"] = event
-    send_notification(
-        event.organizer_email,
-        NotificationType.EVENT_RECEIVED.value,
-        context,
+    send_notifications(
+        [event.organizer_email], NotificationType.EVENT_RECEIVED.value, context
     )
 
 
 def send_event_approved_notification(event):
     context = get_notification_base_context()
     context["event"] = event
-    send_notification(
-        event.organizer_email,
+    send_notifications(
+        [event.organizer_email],
         NotificationType.EVENT_APPROVED_TO_ORGANIZER.value,
         context,
     )
@@ -117,8 +211,7 @@ def send_event_reminder_notification(event):
 
     context = get_notification_base_context()
     context["event"] = event
-    for email in contact_emails:
-        send_notification(email, NotificationType.EVENT_REMINDER.value, context)
+    send_notifications(contact_emails, NotificationType.EVENT_REMINDER.value, context)
 
     event.reminder_sent_at = now()
     event.save(update_fields=("reminder_sent_at",))
@@ -145,12 +238,9 @@ def send_pending_approval_reminder_notification(event):
 
     context = get_notification_base_context()
     context["event"] = event
-    for email in contact_emails:
-        send_notification(
-            email,
-            NotificationType.EVENT_PENDING_APPROVAL_REMINDER.value,
-            context,
-        )
+    send_notifications(
+        contact_emails, NotificationType.EVENT_PENDING_APPROVAL_REMINDER.value, context
+    )
 
     return True
 
@@ -165,14 +255,18 @@ def _send_notifications_to_contractor_and_officials(
     context["event"] = event
 
     contact_emails = event.contract_zone.get_contact_emails()
-    if contact_emails:
-        for email in contact_emails:
-            send_notification(email, notification_type_contractor, context)
-    else:
+    if not contact_emails:
         logger.warning(
             f"Contract zone {event.contract_zone} has no contact email so cannot send "
             f'"{notification_type_contractor}" notification there.'
         )
+    official_emails = get_official_emails()
 
-    for official in User.objects.filter(is_official=True):
-        send_notification(official.email, notification_type_official, context)
+    # render the notification only once when both get the same one
+    if notification_type_official == notification_type_contractor:
+        send_notifications(
+            contact_emails + official_emails, notification_type_contractor, context
+        )
+    else:
+        send_notifications(contact_emails, notification_type_contractor, context)
+        send_notifications(official_emails, notification_type_official, context)
@@ -1,26 +1,123 @@
 from anymail.signals import pre_send
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django_ilmoitin.models import NotificationTemplate
 
-from events.models import Event
-from events.notifications import (
-    send_event_approved_notification,
-    send_event_created_notification,
-    send_event_received_notification,
-)
+from areas.availability import invalidate_unavailable_dates
+from events.models import DAY_LOAD_FIELDS, Event, NotificationJob
+from events.notification_jobs import enqueue_notification_job
+from events.notification_templates import bump_notification_template_version
 from events.signals import event_approved
+from events.statistics import update_statistics_for_event
+from events.zone_day_loads import update_zone_day_loads_for_event
+from users.models import User
+
+NotificationTemplateTranslation = NotificationTemplate._meta.get_field(
+    "translations"
+).related_model
 
 
 @receiver(post_save, sender=Event, dispatch_uid="send_notification_on_creation")
 def send_notification_on_creation(sender, instance, created, **kwargs):
     if created:
-        send_event_created_notification(instance)
-        send_event_received_notification(instance)
+        enqueue_notification_job(instance, NotificationJob.EVENT_CREATED)
 
 
 @receiver(event_approved, sender=Event, dispatch_uid="send_notification_on_approval")
 def send_notification_on_approval(sender, instance, **kwargs):
-    send_event_approved_notification(instance)
+    enqueue_notification_job(instance, NotificationJob.EVENT_APPROVED)
+
+
+@receiver(post_save, sender=Event, dispatch_uid="invalidate_availability_on_save")
+def invalidate_availability_on_save(sender, instance, **kwargs):
+    # other fields do not affect availability, so there is no need to write new
+    # versions of the zones' cached unavailable dates when only they change
+    if any(
+        instance.get_loaded_value(field) != getattr(instance, field)
+        for field in DAY_LOAD_FIELDS
+    ):
+        _invalidate_availability(instance)
+
+
+@receiver(post_delete, sender=Event, dispatch_uid="invalidate_availability_on_delete")
+def invalidate_availability_on_delete(sender, instance, **kwargs):
+    _invalidate_availability(instance)
+
+
+def _invalidate_availability(event):
+    invalidate_unavailable_dates(
+        event.contract_zone_id, event.get_loaded_value("contract_zone_id")
+    )
+
+
+@receiver(post_save, sender=Event, dispatch_uid="update_statistics_on_save")
+def update_statistics_on_save(sender, instance, **kwargs):
+    update_statistics_for_event(instance)
+
+
+@receiver(post_delete, sender=Event, dispatch_uid="update_statistics_on_delete")
+def update_statistics_on_delete(sender, instance, **kwargs):
+    update_statistics_for_event(instance, deleted=True)
+
+
+@receiver(post_save, sender=Event, dispatch_uid="update_zone_day_loads_on_save")
+def update_zone_day_loads_on_save(sender, instance, **kwargs):
+    update_zone_day_loads_for_event(instance)
+
+
+@receiver(post_delete, sender=Event, dispatch_uid="update_zone_day_loads_on_delete")
+def update_zone_day_loads_on_delete(sender, instance, **kwargs):
+    update_zone_day_loads_for_event(instance, deleted=True)
+
+
+@receiver(
+    post_save, sender=NotificationTemplate, dispatch_uid="notification_template_saved"
+)
+@receiver(
+    post_delete,
+    sender=NotificationTemplate,
+    dispatch_uid="notification_template_deleted",
+)
+@receiver(
+    post_save,
+    sender=NotificationTemplateTranslation,
+    dispatch_uid="notification_template_translation_saved",
+)
+@receiver(
+    post_delete,
+    sender=NotificationTemplateTranslation,
+    dispatch_uid="notification_template_translation_deleted",
+)
+@receiver(
+    m2m_changed,
+    sender=NotificationTemplate.admins_to_notify.through,
+    dispatch_uid="notification_template_admins_changed",
+)
+def bump_notification_template_version_on_change(sender, **kwargs):
+    bump_notification_template_version()
+
+
+@receiver(post_save, sender=User, dispatch_uid="notification_admin_saved")
+def bump_notification_template_version_on_admin_email_change(
+    sender, instance, created, **kwargs
+):
+    # compiled templates contain the emails of their admins to notify
+    if (
+        not created
+        and instance.email != instance.get_loaded_value("email")
+        and _is_notification_admin(instance)
+    ):
+        bump_notification_template_version()
+
+
+@receiver(pre_delete, sender=User, dispatch_uid="notification_admin_deleted")
+def bump_notification_template_version_on_admin_delete(sender, instance, **kwargs):
+    if _is_notification_admin(instance):
+        bump_notification_template_version()
+
+
+def _is_notification_admin(user):
+    return NotificationTemplate.objects.filter(admins_to_notify=user).exists()
 
 
 @receiver(pre_send)
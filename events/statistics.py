@@ -0,0 +1,105 @@
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from areas.models import ContractZoneStatistics
+from common.utils import get_local_date
+from events.models import Event
+
+# Event fields whose totals are stored in the statistics
+SUMMED_FIELDS = (
+    "estimated_attendee_count",
+    "small_trash_bag_count",
+    "large_trash_bag_count",
+    "trash_picker_count",
+)
+
+# Fields affecting the statistics of an event
+STATISTICS_FIELDS = ("state", "start_time", "contract_zone_id", *SUMMED_FIELDS)
+
+
+def get_statistics_aggregates():
+    return {
+        "event_count": Count("id"),
+        **{field: Sum(field, default=0) for field in SUMMED_FIELDS},
+    }
+
+
+def update_statistics_for_event(event, deleted=False):
+    """
+    Update the statistics rollup rows affected by a change of the given event
+
+    The rows of both the event's current and previous contract zone and month are
+    recalculated, but only when a field affecting the statistics has changed. The rows
+    are locked before recalculating, so that concurrent changes to events of the same
+    zone and month cannot overwrite each other's totals.
+    """
+    loaded_values = {
+        field: event.get_loaded_value(field) for field in STATISTICS_FIELDS
+    }
+    current_values = {field: getattr(event, field) for field in STATISTICS_FIELDS}
+    if not deleted and loaded_values == current_values:
+        return
+    if Event.APPROVED not in (loaded_values["state"], current_values["state"]):
+        return
+
+    buckets = set()
+    for values in (loaded_values, current_values):
+        if values["contract_zone_id"] and values["start_time"]:
+            start_date = get_local_date(values["start_time"])
+            buckets.add((values["contract_zone_id"], start_date.year, start_date.month))
+
+    lock_statistics(buckets)
+    for contract_zone_id, year, month in buckets:
+        update_statistics(contract_zone_id, year, month)
+
+
+def lock_statistics(buckets):
+    """
+    Lock the statistics of the given contract zone months until the end of the
+    current transaction
+
+    Transaction level advisory locks with a single key made of the zone and the month
+    are used. They never conflict with the two key vacation day group locks. The
+    months are locked in order to avoid deadlocks.
+
+    :param buckets: Iterable of (contract zone ID, year, month) tuples.
+    """
+    keys = sorted(
+        (contract_zone_id << 20) | (year * 12 + month - 1)
+        for contract_zone_id, year, month in buckets
+    )
+    with connection.cursor() as cursor:
+        for key in keys:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
+
+
+def update_statistics(contract_zone_id, year, month):
+    """Recalculate the statistics rollup row of the given contract zone and month"""
+    totals = Event.objects.filter(
+        contract_zone_id=contract_zone_id,
+        state=Event.APPROVED,
+        start_time__year=year,
+        start_time__month=month,
+    ).aggregate(**get_statistics_aggregates())
+    ContractZoneStatistics.objects.update_or_create(
+        contract_zone_id=contract_zone_id, year=year, month=month, defaults=totals
+    )
+
+
+@transaction.atomic
+def rebuild_statistics():
+    """Rebuild all the statistics rollup rows from the events in one grouped query"""
+    rows = (
+        Event.objects.filter(state=Event.APPROVED)
+        .annotate(year=ExtractYear("start_time"), month=ExtractMonth("start_time"))
+        .values("contract_zone_id", "year", "month")
+        .annotate(**get_statistics_aggregates())
+        .order_by()
+    )
+    ContractZoneStatistics.objects.all().delete()
+    return len(
+        ContractZoneStatistics.objects.bulk_create(
+            ContractZoneStatistics(**row) for row in rows
+        )
+    )
@@ -1,8 +1,12 @@
 import pytest
+from django.contrib import admin
 from django.core.exceptions import ValidationError
 from django.utils import translation
 
-from events.admin import ValidatedNotificationTemplateForm
+from events.admin import NotificationJobAdmin, ValidatedNotificationTemplateForm
+from events.factories import EventFactory
+from events.models import NotificationJob
+from events.notification_jobs import MAX_ATTEMPTS
 from events.notifications import NotificationType
 
 
@@ -44,3 +48,18 @@ def test_clean_invalid_body_text_raises_error():
         match="body_text: template rendering failed: 'undefined_variable' is undefined",
     ):
         call_clean(body_text="{{ undefined_variable }}")
+
+
+def test_notification_job_admin_retry_resets_attempts():
+    job = NotificationJob.objects.create(
+        event=EventFactory(),
+        type=NotificationJob.EVENT_CREATED,
+        attempts=MAX_ATTEMPTS,
+    )
+
+    NotificationJobAdmin(NotificationJob, admin.site).retry(
+        None, NotificationJob.objects.all()
+    )
+
+    job.refresh_from_db()
+    assert job.attempts == 0
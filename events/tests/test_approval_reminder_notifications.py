@@ -13,6 +13,8 @@ import pytest
 from django.conf import settings
 from django.core import mail
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import localtime, now
 from django_ilmoitin.models import NotificationTemplate
 from freezegun import freeze_time
@@ -462,3 +464,54 @@ class TestEdgeCases:
             call_command("send_approval_reminder_notifications")
             assert len(mail.outbox) == 2
             assert_to_addresses(contract_zone1.email, contract_zone2.email)
+
+    def test_sent_reminders_recorded_with_single_update(self, notification_template):
+        """Sent reminders of all the events should be recorded with one UPDATE."""
+        with freeze_time("2018-01-08T08:00:00Z"):  # Monday
+            contract_zone = ContractZoneFactory(
+                email="contractor@test.test", secondary_email=""
+            )
+            creation_events = EventFactory.create_batch(
+                3,
+                state=Event.WAITING_FOR_APPROVAL,
+                contract_zone=contract_zone,
+                start_time=now() + timedelta(days=30),
+            )
+        with freeze_time("2018-01-11T08:00:00Z"):  # Thursday
+            deadline_events = EventFactory.create_batch(
+                3,
+                state=Event.WAITING_FOR_APPROVAL,
+                contract_zone=contract_zone,
+                start_time=now()
+                + timedelta(days=settings.APPROVAL_REMINDER_DAYS_BEFORE_EVENT),
+            )
+            # not due today
+            not_due_event = EventFactory(
+                state=Event.WAITING_FOR_APPROVAL,
+                contract_zone=contract_zone,
+                start_time=now() + timedelta(days=30),
+            )
+            mail.outbox = []
+
+            with CaptureQueriesContext(connection) as context:
+                call_command("send_approval_reminder_notifications")
+
+            assert len(mail.outbox) == 6
+            event_updates = [
+                query
+                for query in context.captured_queries
+                if query["sql"].startswith(f'UPDATE "{Event._meta.db_table}"')
+            ]
+            assert len(event_updates) == 1
+
+        for event in creation_events:
+            event.refresh_from_db()
+            assert event.approval_creation_reminder_sent_at is not None
+            assert event.approval_deadline_reminder_sent_at is None
+        for event in deadline_events:
+            event.refresh_from_db()
+            assert event.approval_creation_reminder_sent_at is None
+            assert event.approval_deadline_reminder_sent_at is not None
+        not_due_event.refresh_from_db()
+        assert not_due_event.approval_creation_reminder_sent_at is None
+        assert not_due_event.approval_deadline_reminder_sent_at is None
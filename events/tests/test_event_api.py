@@ -1,16 +1,20 @@
+import threading
 from datetime import datetime, timedelta
 from typing import Any
 
 import pytest
 from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.db import connection
 from django.utils import timezone
 from django.utils.timezone import localtime
 from freezegun import freeze_time
 from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
 
 from areas.factories import BlockedDateFactory, ContractZoneFactory
 from areas.models import ContractZone
 from common.tests.utils import assert_objects_in_results, delete, get, patch, post, put
+from events import api as events_api
 from events.factories import EventFactory
 from events.models import Event
 from users.factories import UserFactory
@@ -326,6 +330,37 @@ def test_official_can_modify_and_delete_event(
     delete(official_api_client, url)
 
 
+def test_event_update_locks_old_and_new_groups_at_once(
+    official_api_client, event, make_event_data, monkeypatch
+):
+    other_contract_zone = ContractZoneFactory()
+    old_start_date = localtime(event.start_time).date()
+    event_data = make_event_data(contract_zone=other_contract_zone)
+    new_start_date = localtime(event_data["start_time"]).date()
+    lock_calls = []
+
+    def lock_vacation_day_groups(ranges):
+        ranges = list(ranges)
+        lock_calls.append(ranges)
+        original_lock_vacation_day_groups(ranges)
+
+    original_lock_vacation_day_groups = events_api.lock_vacation_day_groups
+    monkeypatch.setattr(
+        events_api, "lock_vacation_day_groups", lock_vacation_day_groups
+    )
+
+    put(official_api_client, get_detail_url(event), event_data)
+
+    # the first locks taken cover both the old and the new zone and dates
+    assert {
+        (contract_zone_id, first_day)
+        for contract_zone_id, first_day, _last_day in lock_calls[0]
+    } == {
+        (event.contract_zone_id, old_start_date),
+        (other_contract_zone.pk, new_start_date),
+    }
+
+
 def test_superuser_can_modify_and_delete_event(
     superuser_api_client, event, make_event_data
 ):
@@ -548,3 +583,78 @@ def test_event_can_be_modified_when_days_are_full(
 
     event.refresh_from_db()
     assert event.name == "Modified name"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_event_creation_respects_maximum_count(
+    settings, official, contract_zone, make_event_data
+):
+    submission_count = 8
+    event_data = make_event_data(contract_zone=contract_zone)
+    barrier = threading.Barrier(submission_count)
+    status_codes = []
+
+    def submit():
+        api_client = APIClient()
+        api_client.force_authenticate(user=official)
+        try:
+            barrier.wait()
+            response = api_client.post(LIST_URL, event_data, format="json")
+            status_codes.append(response.status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=submit) for _ in range(submission_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    max_count = settings.EVENT_MAXIMUM_COUNT_PER_CONTRACT_ZONE
+    assert sorted(status_codes) == [201] * max_count + [400] * (
+        submission_count - max_count
+    )
+    assert Event.objects.filter(contract_zone=contract_zone).count() == max_count
+
+
+def test_cursor_pagination(official_api_client, contract_zone):
+    start_time = timezone.now() + timedelta(days=10)
+    later_event = EventFactory(
+        contract_zone=contract_zone,
+        start_time=start_time + timedelta(days=1),
+        end_time=start_time + timedelta(days=1, hours=2),
+    )
+    events = EventFactory.create_batch(
+        3,
+        contract_zone=contract_zone,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=2),
+    )
+    earlier_event = EventFactory(
+        contract_zone=contract_zone,
+        start_time=start_time - timedelta(days=1),
+        end_time=start_time - timedelta(days=1, hours=-2),
+    )
+    expected_ids = [e.id for e in (earlier_event, *events, later_event)]
+
+    data = get(official_api_client, f"{LIST_URL}?pagination=cursor&limit=2")
+    assert "count" not in data
+    ids = [result["id"] for result in data["results"]]
+
+    # an event added before the current position does not shift the later pages
+    EventFactory(
+        contract_zone=contract_zone,
+        start_time=start_time - timedelta(days=2),
+        end_time=start_time - timedelta(days=2, hours=-2),
+    )
+
+    while data["next"]:
+        data = get(official_api_client, data["next"])
+        assert len(data["results"]) <= 2
+        ids.extend(result["id"] for result in data["results"])
+
+    assert ids == expected_ids
+
+
+def test_cursor_pagination_invalid_cursor(official_api_client):
+    get(official_api_client, f"{LIST_URL}?pagination=cursor&cursor=invalid", 404)
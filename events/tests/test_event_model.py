@@ -1,9 +1,16 @@
+from datetime import datetime, timedelta
+
 import pytest
+from django.contrib import admin
 from django.contrib.gis.geos import MultiPolygon, Point, Polygon
 from django.core.exceptions import ValidationError
+from django.utils.timezone import localtime, make_aware
 
 from areas.factories import ContractZoneFactory
+from common.tests.utils import get_advisory_locks
+from events.admin import EventAdmin
 from events.factories import EventFactory
+from events.models import Event
 
 
 def test_contract_zone_autopopulating():
@@ -49,3 +56,58 @@ def test_contract_zone_autopopulating():
 def test_get_contact_emails(email, secondary_email, expected):
     contract_zone = ContractZoneFactory(email=email, secondary_email=secondary_email)
     assert contract_zone.get_contact_emails() == expected
+
+
+def create_event_without_locking(**kwargs):
+    event = Event.objects.bulk_create([EventFactory.build(**kwargs)])[0]
+    return Event.objects.get(pk=event.pk)
+
+
+def get_group_lock(contract_zone, day):
+    return (contract_zone.pk, localtime(day).date().toordinal())
+
+
+def test_save_locks_old_and_new_vacation_day_groups():
+    contract_zone, other_contract_zone = ContractZoneFactory.create_batch(2)
+    event = create_event_without_locking(contract_zone=contract_zone)
+    old_start_time = event.start_time
+    assert get_advisory_locks() == set()
+
+    event.contract_zone = other_contract_zone
+    event.start_time += timedelta(days=7)
+    event.end_time += timedelta(days=7)
+    event.save()
+
+    assert get_advisory_locks() == {
+        get_group_lock(contract_zone, old_start_time),
+        get_group_lock(other_contract_zone, event.start_time),
+    }
+
+
+def test_delete_locks_vacation_day_groups():
+    contract_zone = ContractZoneFactory()
+    event = create_event_without_locking(contract_zone=contract_zone)
+
+    event.delete()
+
+    assert get_advisory_locks() == {get_group_lock(contract_zone, event.start_time)}
+
+
+def test_admin_bulk_delete_locks_vacation_day_groups():
+    contract_zone = ContractZoneFactory()
+    events = [
+        create_event_without_locking(
+            contract_zone=contract_zone, start_time=start_time, end_time=start_time
+        )
+        for start_time in (
+            make_aware(datetime(2018, 12, 10, 12)),
+            make_aware(datetime(2018, 12, 11, 12)),
+        )
+    ]
+
+    EventAdmin(Event, admin.site).delete_queryset(None, Event.objects.all())
+
+    assert not Event.objects.exists()
+    assert get_advisory_locks() == {
+        get_group_lock(contract_zone, event.start_time) for event in events
+    }
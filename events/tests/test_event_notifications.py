@@ -3,15 +3,26 @@ from datetime import timedelta
 import pytest
 from django.core import mail
 from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import localtime, now
 from django_ilmoitin.models import NotificationTemplate
 from freezegun import freeze_time
+from mailer.models import Message
 
 from areas.factories import ContractZoneFactory
+from common.models import CacheVersion
 from common.utils import assert_to_addresses
 from events.factories import EventFactory
-from events.models import Event
-from events.notifications import NotificationType
+from events.models import Event, NotificationJob
+from events.notification_jobs import MAX_ATTEMPTS
+from events.notification_templates import (
+    VERSION_KEY,
+    CompiledNotificationTemplate,
+    bump_notification_template_version,
+)
+from events.notifications import NotificationType, send_event_created_notification
+from users.factories import UserFactory
 
 
 @pytest.fixture
@@ -94,12 +105,16 @@ def test_event_received_notification_is_sent_to_organizer(
 
 
 def test_event_created_notification_is_sent_to_contractors_and_admin(
-    notification_template_event_created, notification_template_event_received, official
+    notification_template_event_created,
+    notification_template_event_received,
+    official,
+    django_capture_on_commit_callbacks,
 ):
     contract_zone = ContractZoneFactory(
         email="primary@test.test", secondary_email="secondary@test.test"
     )
-    event = EventFactory(contract_zone=contract_zone)
+    with django_capture_on_commit_callbacks(execute=True):
+        event = EventFactory(contract_zone=contract_zone)
 
     # Should now be 4 emails: 3 for contractors/officials + 1 for organizer
     assert len(mail.outbox) == 4
@@ -140,6 +155,7 @@ def test_event_approved_to_organizer_notification_is_sent_to_organizer_and_contr
     notification_template_event_approved_to_contractor,
     notification_template_event_approved_to_official,
     official,
+    django_capture_on_commit_callbacks,
 ):
     contract_zone.secondary_email = "mark@example.com"
     contract_zone.save()
@@ -149,8 +165,9 @@ def test_event_approved_to_organizer_notification_is_sent_to_organizer_and_contr
         contract_zone=contract_zone,
     )
     mail.outbox = []
-    event.state = Event.APPROVED
-    event.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        event.state = Event.APPROVED
+        event.save()
 
     assert len(mail.outbox) == 4
     subject_str = "hello {}! event {} approved!"
@@ -169,6 +186,282 @@ def test_event_approved_to_organizer_notification_is_sent_to_organizer_and_contr
     )
 
 
+def test_notifications_are_sent_after_commit(
+    notification_template_event_created,
+    notification_template_event_received,
+    official,
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks() as callbacks:
+        event = EventFactory()
+
+        job = NotificationJob.objects.get()
+        assert job.event == event
+        assert job.type == NotificationJob.EVENT_CREATED
+        assert len(mail.outbox) == 0
+
+    for callback in callbacks:
+        callback()
+
+    assert len(mail.outbox) == 4
+    assert not NotificationJob.objects.exists()
+
+
+def test_failed_notification_job_is_kept_for_retry(
+    notification_template_event_created,
+    notification_template_event_received,
+    official,
+    django_capture_on_commit_callbacks,
+    monkeypatch,
+):
+    def fail(event):
+        raise ConnectionError("mail server is down")
+
+    monkeypatch.setattr(
+        "events.notification_jobs.send_event_created_notification", fail
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        EventFactory()
+
+    job = NotificationJob.objects.get()
+    assert job.attempts == 1
+    assert "mail server is down" in job.last_error
+    assert len(mail.outbox) == 0
+
+    monkeypatch.undo()
+    call_command("send_notification_jobs")
+
+    assert len(mail.outbox) == 4
+    assert not NotificationJob.objects.exists()
+
+
+def test_notification_jobs_are_not_run_on_commit_when_disabled(
+    settings,
+    notification_template_event_created,
+    notification_template_event_received,
+    django_capture_on_commit_callbacks,
+):
+    settings.NOTIFICATION_JOBS_RUN_ON_COMMIT = False
+
+    with django_capture_on_commit_callbacks(execute=True):
+        EventFactory()
+
+    assert len(mail.outbox) == 0
+    assert NotificationJob.objects.count() == 1
+
+    call_command("send_notification_jobs")
+
+    # 2 contract zone contacts and the organizer
+    assert len(mail.outbox) == 3
+    assert not NotificationJob.objects.exists()
+
+
+def test_partially_failed_notification_job_does_not_send_duplicates(
+    settings,
+    notification_template_event_created,
+    notification_template_event_received,
+    official,
+    monkeypatch,
+):
+    settings.EMAIL_BACKEND = "mailer.backend.DbBackend"
+    settings.MAILER_EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+    def fail(event):
+        raise ConnectionError("mail server is down")
+
+    # the event created notifications are queued before this fails
+    monkeypatch.setattr(
+        "events.notification_jobs.send_event_received_notification", fail
+    )
+    event = EventFactory()
+    call_command("send_notification_jobs")
+
+    assert len(mail.outbox) == 0
+    assert not Message.objects.exists()
+
+    monkeypatch.undo()
+    call_command("send_notification_jobs")
+
+    assert len(mail.outbox) == 4
+    assert sorted(message.to[0] for message in mail.outbox) == sorted(
+        [
+            official.email,
+            event.contract_zone.email,
+            event.contract_zone.secondary_email,
+            event.organizer_email,
+        ]
+    )
+    assert not NotificationJob.objects.exists()
+
+
+def test_notification_jobs_failing_too_many_times_are_not_retried(
+    notification_template_event_created,
+):
+    job = NotificationJob.objects.create(
+        event=EventFactory(),
+        type=NotificationJob.EVENT_CREATED,
+        attempts=MAX_ATTEMPTS,
+    )
+
+    call_command("send_notification_jobs")
+
+    assert len(mail.outbox) == 0
+    job.refresh_from_db()
+    assert job.attempts == MAX_ATTEMPTS
+
+
+def test_notification_job_failing_the_last_time_is_logged_as_error(
+    notification_template_event_created, monkeypatch, caplog
+):
+    def fail(event):
+        raise ConnectionError("mail server is down")
+
+    monkeypatch.setattr(
+        "events.notification_jobs.send_event_created_notification", fail
+    )
+    NotificationJob.objects.create(
+        event=EventFactory(),
+        type=NotificationJob.EVENT_CREATED,
+        attempts=MAX_ATTEMPTS - 1,
+    )
+
+    call_command("send_notification_jobs")
+
+    assert [
+        record
+        for record in caplog.records
+        if record.levelname == "ERROR" and "will not be retried" in record.message
+    ]
+
+
+def test_notification_fan_out_cost_does_not_depend_on_official_count(
+    notification_template_event_created, monkeypatch
+):
+    renders = []
+    original_render = CompiledNotificationTemplate.render
+
+    def render(template, context):
+        renders.append(context)
+        return original_render(template, context)
+
+    monkeypatch.setattr(CompiledNotificationTemplate, "render", render)
+
+    def send_event_created_notification_with_officials(official_count):
+        UserFactory.create_batch(official_count, is_official=True)
+        event = EventFactory()
+        renders.clear()
+        mail.outbox = []
+        # make the template be fetched and compiled again
+        bump_notification_template_version()
+
+        with CaptureQueriesContext(connection) as queries:
+            send_event_created_notification(event)
+
+        template_query_count = get_template_query_count(queries)
+        return len(queries), template_query_count, len(mail.outbox)
+
+    query_count, template_query_count, mail_count = (
+        send_event_created_notification_with_officials(1)
+    )
+    assert len(renders) == 1
+    assert mail_count == 3
+
+    assert send_event_created_notification_with_officials(10) == (
+        query_count,
+        template_query_count,
+        13,
+    )
+    assert len(renders) == 1
+
+
+def get_template_query_count(queries):
+    return sum(NotificationTemplate._meta.db_table in query["sql"] for query in queries)
+
+
+def test_notification_template_is_fetched_once(notification_template_event_created):
+    event = EventFactory()
+    send_event_created_notification(event)
+
+    with CaptureQueriesContext(connection) as queries:
+        send_event_created_notification(event)
+
+    assert get_template_query_count(queries) == 0
+    assert len(mail.outbox) == 4
+
+
+def test_notification_template_cache_invalidated_on_template_changes(
+    notification_template_event_created, official
+):
+    event = EventFactory()
+    send_event_created_notification(event)
+
+    template = notification_template_event_created
+    template.subject = "changed subject, event: {{ event.name }}!"
+    template.admin_notification_subject = "admin subject"
+    template.admin_notification_text = "admin text"
+    template.save()
+    mail.outbox = []
+    send_event_created_notification(event)
+
+    assert len(mail.outbox) == 3
+    assert mail.outbox[0].subject == f"changed subject, event: {event.name}!"
+
+    admin = UserFactory()
+    template.admins_to_notify.add(admin)
+    mail.outbox = []
+    send_event_created_notification(event)
+
+    assert len(mail.outbox) == 4
+    assert mail.outbox[3].subject == "admin subject"
+    assert mail.outbox[3].to == [admin.email]
+
+
+def test_notification_template_cache_invalidated_on_admin_email_change(
+    notification_template_event_created,
+):
+    admin = UserFactory()
+    template = notification_template_event_created
+    template.admin_notification_subject = "admin subject"
+    template.admin_notification_text = "admin text"
+    template.save()
+    template.admins_to_notify.add(admin)
+    event = EventFactory()
+    send_event_created_notification(event)
+
+    admin.email = "changed@example.com"
+    admin.save()
+    mail.outbox = []
+    send_event_created_notification(event)
+
+    assert mail.outbox[-1].to == ["changed@example.com"]
+
+    admin.delete()
+    mail.outbox = []
+    send_event_created_notification(event)
+
+    # the contract zone contacts only
+    assert len(mail.outbox) == 2
+
+
+def test_notification_template_version_is_shared_through_the_database(
+    notification_template_event_created,
+):
+    event = EventFactory()
+    send_event_created_notification(event)
+
+    # e.g. the template edited in the admin of another process with its own cache
+    notification_template_event_created.translations.filter(language_code="fi").update(
+        subject="changed subject"
+    )
+    CacheVersion.objects.update_or_create(
+        key=VERSION_KEY, defaults={"version": "other process"}
+    )
+    mail.outbox = []
+    send_event_created_notification(event)
+
+    assert mail.outbox[0].subject == "changed subject"
+
+
 @pytest.mark.parametrize("vacation_involved", (True, False))
 def test_event_reminder_notification_is_sent_to_contractors_in_time(
     notification_template_event_reminder, vacation_involved
@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils.timezone import now
+
+from areas.factories import ContractZoneFactory
+from events.factories import EventFactory
+from events.models import Event
+
+SEEDED_EVENT_COUNT = 500
+
+
+@pytest.fixture
+def contract_zones():
+    return ContractZoneFactory.create_batch(3)
+
+
+@pytest.fixture(autouse=True)
+def seeded_events(contract_zones):
+    events = []
+    for i in range(SEEDED_EVENT_COUNT):
+        start_time = now() + timedelta(days=i - SEEDED_EVENT_COUNT // 2, hours=i % 12)
+        events.append(
+            EventFactory.build(
+                contract_zone=contract_zones[i % len(contract_zones)],
+                state=Event.APPROVED if i % 3 else Event.WAITING_FOR_APPROVAL,
+                start_time=start_time,
+                end_time=start_time + timedelta(hours=3),
+                reminder_sent_at=start_time if i % 2 else None,
+                is_anonymized=i < SEEDED_EVENT_COUNT // 4,
+            )
+        )
+    Event.objects.bulk_create(events)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {Event._meta.db_table}")
+
+
+def get_query_plan(queryset):
+    """
+    Return the query plan of the given queryset without its ordering
+
+    Sequential scans are disabled, so the planner falls back to one only when no index
+    can be used for the filters.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.order_by().explain()
+
+
+@pytest.mark.parametrize(
+    "get_queryset, expected_indexes",
+    [
+        # public event list
+        (
+            lambda zone: Event.objects.filter(
+                state=Event.APPROVED, is_anonymized=False, start_time__gte=now()
+            ),
+            {"event_state_start_idx", "event_start_not_anon_idx"},
+        ),
+        # event list time range filters
+        (
+            lambda zone: Event.objects.filter(
+                is_anonymized=False,
+                start_time__gte=now(),
+                start_time__lte=now() + timedelta(days=30),
+            ),
+            {"event_start_not_anon_idx"},
+        ),
+        (
+            lambda zone: Event.objects.filter(is_anonymized=False, end_time__lte=now()),
+            {"event_end_not_anon_idx"},
+        ),
+        # event list contract zone filter
+        (
+            lambda zone: Event.objects.filter(contract_zone=zone, is_anonymized=False),
+            {"event_zone_start_time_idx"},
+        ),
+        # event reminders
+        (
+            lambda zone: Event.objects.filter(
+                start_time__gt=now(), reminder_sent_at=None
+            ),
+            {"event_reminder_pending_idx"},
+        ),
+        # approval reminders
+        (
+            lambda zone: Event.objects.filter(
+                state=Event.WAITING_FOR_APPROVAL, start_time__gt=now()
+            ),
+            {"event_state_start_idx"},
+        ),
+        # zone day loads
+        (
+            lambda zone: Event.objects.filter(
+                contract_zone=zone,
+                start_time__lt=now() + timedelta(days=3),
+                end_time__gte=now(),
+            ),
+            {"event_zone_start_time_idx"},
+        ),
+    ],
+    ids=[
+        "public_list",
+        "start_time_range",
+        "end_time_range",
+        "contract_zone",
+        "event_reminders",
+        "approval_reminders",
+        "zone_day_loads",
+    ],
+)
+def test_event_queries_use_indexes(contract_zones, get_queryset, expected_indexes):
+    plan = get_query_plan(get_queryset(contract_zones[0]))
+
+    assert f"Seq Scan on {Event._meta.db_table}" not in plan, plan
+    assert any(index in plan for index in expected_indexes), plan
@@ -0,0 +1,131 @@
+import threading
+from datetime import datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils.timezone import make_aware
+
+from areas.factories import ContractZoneFactory
+from areas.models import ContractZoneStatistics
+from events.factories import EventFactory
+from events.models import Event
+
+
+def get_statistics(contract_zone, year=2018, month=3):
+    statistics = ContractZoneStatistics.objects.filter(
+        contract_zone=contract_zone, year=year, month=month
+    ).first()
+    if not statistics:
+        return (0, 0)
+    return (statistics.event_count, statistics.estimated_attendee_count)
+
+
+def test_statistics_updated_on_event_changes(contract_zone):
+    event = EventFactory(
+        contract_zone=contract_zone,
+        start_time=make_aware(datetime(2018, 3, 3)),
+        estimated_attendee_count=10,
+    )
+    assert get_statistics(contract_zone) == (1, 10)
+
+    event = Event.objects.get(pk=event.pk)
+    event.estimated_attendee_count = 15
+    event.save()
+    assert get_statistics(contract_zone) == (1, 15)
+
+    event.state = Event.WAITING_FOR_APPROVAL
+    event.save()
+    assert get_statistics(contract_zone) == (0, 0)
+
+    event.state = Event.APPROVED
+    event.start_time = make_aware(datetime(2018, 4, 3))
+    event.save()
+    assert get_statistics(contract_zone) == (0, 0)
+    assert get_statistics(contract_zone, month=4) == (1, 15)
+
+    other_contract_zone = ContractZoneFactory()
+    event.contract_zone = other_contract_zone
+    event.save()
+    assert get_statistics(contract_zone, month=4) == (0, 0)
+    assert get_statistics(other_contract_zone, month=4) == (1, 15)
+
+    event.delete()
+    assert get_statistics(other_contract_zone, month=4) == (0, 0)
+
+
+def test_statistics_not_updated_on_irrelevant_changes(
+    contract_zone, django_assert_num_queries
+):
+    event = EventFactory(
+        contract_zone=contract_zone, start_time=make_aware(datetime(2018, 3, 3))
+    )
+    event.name = "new name"
+
+    # creating and releasing a savepoint, locking the event's vacation day group,
+    # fetching the old state and saving the event
+    with django_assert_num_queries(5):
+        event.save()
+
+
+def test_rebuild_contract_zone_statistics_command(contract_zone):
+    EventFactory.create_batch(
+        2,
+        contract_zone=contract_zone,
+        start_time=make_aware(datetime(2018, 3, 3)),
+        estimated_attendee_count=10,
+    )
+    EventFactory(
+        contract_zone=contract_zone,
+        start_time=make_aware(datetime(2018, 3, 4)),
+        state=Event.WAITING_FOR_APPROVAL,
+    )
+    ContractZoneStatistics.objects.all().delete()
+
+    call_command("rebuild_contract_zone_statistics")
+
+    assert get_statistics(contract_zone) == (2, 20)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_event_changes_do_not_overwrite_statistics(contract_zone):
+    def create_event(day):
+        return EventFactory(
+            contract_zone=contract_zone,
+            start_time=make_aware(datetime(2018, 3, day, 10)),
+            end_time=make_aware(datetime(2018, 3, day, 12)),
+            estimated_attendee_count=10,
+        )
+
+    create_event(2)
+    created = threading.Event()
+    release = threading.Event()
+
+    def create_event_in_transaction():
+        try:
+            with transaction.atomic():
+                create_event(5)
+                created.set()
+                release.wait(5)
+        finally:
+            connection.close()
+
+    def create_other_event():
+        try:
+            # in a different vacation day group of the same month
+            create_event(6)
+        finally:
+            connection.close()
+
+    first = threading.Thread(target=create_event_in_transaction)
+    first.start()
+    assert created.wait(5)
+
+    second = threading.Thread(target=create_other_event)
+    second.start()
+    second.join(0.5)
+    release.set()
+    first.join()
+    second.join()
+
+    assert get_statistics(contract_zone) == (3, 30)
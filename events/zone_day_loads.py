@@ -0,0 +1,94 @@
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.db.models.functions import TruncDate
+
+from areas.availability import get_group_event_counts, lock_vacation_day_groups
+from areas.models import ZoneDayLoad
+from common.utils import ONE_DAY, get_day_start, vacation_calendar
+from events.models import DAY_LOAD_FIELDS, Event
+
+
+def update_zone_day_loads_for_event(event, deleted=False):
+    """
+    Update the zone day load rows affected by a change of the given event
+
+    The rows of the vacation day groups of both the event's current and previous
+    contract zone and dates are recalculated, but only when a field affecting the day
+    loads has changed. All those groups are locked before recalculating any of them,
+    so that concurrent changes of the same groups cannot overwrite each other's counts.
+    """
+    if not deleted and all(
+        event.get_loaded_value(field) == getattr(event, field)
+        for field in DAY_LOAD_FIELDS
+    ):
+        return
+
+    ranges = event.get_day_load_ranges()
+    with transaction.atomic():
+        lock_vacation_day_groups(ranges)
+        for contract_zone_id, first_day, last_day in ranges:
+            update_zone_day_loads(contract_zone_id, first_day, last_day)
+
+
+@transaction.atomic
+def update_zone_day_loads(contract_zone_id, first_day, last_day):
+    """
+    Recalculate the zone day load rows of the given contract zone and date range
+
+    The range is extended to whole vacation day groups, and the events touching it are
+    counted in a single aggregated query. Returns the number of rows with events.
+
+    The caller is responsible for locking the groups of the range with
+    lock_vacation_day_groups() or the whole table.
+    """
+    first_day = vacation_calendar.get_group(first_day)[0]
+    last_day = vacation_calendar.get_group(last_day)[1]
+
+    # comparing the times instead of their dates lets the zone and start time index
+    # be used
+    events = Event.objects.filter(
+        contract_zone_id=contract_zone_id,
+        start_time__lt=get_day_start(last_day + ONE_DAY),
+        end_time__gte=get_day_start(first_day),
+    )
+    counts = get_group_event_counts(events, first_day, last_day)
+
+    ZoneDayLoad.objects.filter(
+        contract_zone_id=contract_zone_id, date__range=(first_day, last_day)
+    ).exclude(date__in=counts).delete()
+    ZoneDayLoad.objects.bulk_create(
+        [
+            ZoneDayLoad(
+                contract_zone_id=contract_zone_id, date=date, event_count=event_count
+            )
+            for date, event_count in counts.items()
+        ],
+        update_conflicts=True,
+        unique_fields=("contract_zone", "date"),
+        update_fields=("event_count",),
+    )
+    return len(counts)
+
+
+@transaction.atomic
+def rebuild_zone_day_loads():
+    """
+    Rebuild the zone day load rows of all contract zones from the events
+
+    The table is locked against writes for the duration of the rebuild, so that
+    concurrent event changes update their rows only after it.
+    """
+    zone_date_ranges = (
+        Event.objects.exclude(contract_zone=None)
+        .values("contract_zone_id")
+        .annotate(
+            first_day=Min(TruncDate("start_time")), last_day=Max(TruncDate("end_time"))
+        )
+        .order_by()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {ZoneDayLoad._meta.db_table} IN EXCLUSIVE MODE")
+    ZoneDayLoad.objects.all().delete()
+    return sum(
+        update_zone_day_loads(**zone_date_range) for zone_date_range in zone_date_ranges
+    )
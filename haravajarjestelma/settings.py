@@ -64,6 +64,7 @@ env = environ.Env(
     EVENT_REMINDER_DAYS_IN_ADVANCE=(int, 2),
     APPROVAL_REMINDER_DAYS_AFTER_CREATION=(int, 3),  # Set to -1 to disable reminder
     APPROVAL_REMINDER_DAYS_BEFORE_EVENT=(int, 5),  # Set to -1 to disable reminder
+    NOTIFICATION_JOBS_RUN_ON_COMMIT=(bool, True),
     HELSINKI_WFS_BASE_URL=(str, "https://kartta.hel.fi/ws/geoserver/avoindata/wfs"),
     EXCLUDED_CONTRACT_ZONES=(list, []),
     DIGITRANSIT_ADDRESS_SEARCH_URL=(
@@ -71,6 +72,9 @@ env = environ.Env(
         "https://api.digitransit.fi/geocoding/v1/search",
     ),
     DIGITRANSIT_API_KEY=(str, ""),
+    ADDRESS_SEARCH_BACKEND=(str, "digitransit"),
+    DIGITRANSIT_CONNECT_TIMEOUT=(float, 3.05),
+    DIGITRANSIT_READ_TIMEOUT=(float, 5),
     TILE_URL=(
         str,
         "https://maptiles.api.hel.fi/styles/hel-osm-bright-fi/{z}/{x}/{y}.png",
@@ -267,12 +271,19 @@ EVENT_REMINDER_DAYS_IN_ADVANCE = env("EVENT_REMINDER_DAYS_IN_ADVANCE")
 APPROVAL_REMINDER_DAYS_AFTER_CREATION = env("APPROVAL_REMINDER_DAYS_AFTER_CREATION")
 APPROVAL_REMINDER_DAYS_BEFORE_EVENT = env("APPROVAL_REMINDER_DAYS_BEFORE_EVENT")
 
+# When disabled, event notifications are sent only by send_notification_jobs
+NOTIFICATION_JOBS_RUN_ON_COMMIT = env("NOTIFICATION_JOBS_RUN_ON_COMMIT")
+
 HELSINKI_WFS_BASE_URL = env("HELSINKI_WFS_BASE_URL")
 
 EXCLUDED_CONTRACT_ZONES = env("EXCLUDED_CONTRACT_ZONES")
 
+# "digitransit" or "local", see areas.address_search
+ADDRESS_SEARCH_BACKEND = env("ADDRESS_SEARCH_BACKEND")
 DIGITRANSIT_ADDRESS_SEARCH_URL = env("DIGITRANSIT_ADDRESS_SEARCH_URL")
 DIGITRANSIT_API_KEY = env("DIGITRANSIT_API_KEY")
+DIGITRANSIT_CONNECT_TIMEOUT = env("DIGITRANSIT_CONNECT_TIMEOUT")
+DIGITRANSIT_READ_TIMEOUT = env("DIGITRANSIT_READ_TIMEOUT")
 TILE_URL = env("TILE_URL")
 
 CORS_ALLOWED_ORIGINS = env("CORS_ALLOWED_ORIGINS")
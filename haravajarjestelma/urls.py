@@ -2,7 +2,12 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from areas.api import AddressSearchViewSet, ContractZoneViewSet, GeoQueryViewSet
+from areas.api import (
+    AddressSearchViewSet,
+    ContractZoneStatisticsViewSet,
+    ContractZoneViewSet,
+    GeoQueryViewSet,
+)
 from events.api import EventViewSet
 from users.api import UserViewSet
 
@@ -12,6 +17,11 @@ router.register("geo_query", GeoQueryViewSet, basename="geo_query")
 router.register("address_search", AddressSearchViewSet, basename="address_search")
 router.register("user", UserViewSet)
 router.register("contract_zone", ContractZoneViewSet)
+router.register(
+    "contract_zone_statistics",
+    ContractZoneStatisticsViewSet,
+    basename="contract_zone_statistics",
+)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
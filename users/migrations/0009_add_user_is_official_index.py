@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0008_user_last_api_use"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="is_official",
+            field=models.BooleanField(
+                db_index=True, default=False, verbose_name="official"
+            ),
+        ),
+    ]
@@ -1,10 +1,14 @@
+from django.core.cache import cache
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from helsinki_gdpr.models import SerializableMixin
 from helusers.models import AbstractUser
 
+from common.cache_versions import bump_cache_versions, get_cache_version
+from common.models import LoadedValuesMixin
 
-class User(AbstractUser, SerializableMixin):
+
+class User(LoadedValuesMixin, AbstractUser, SerializableMixin):
     serialize_fields = (
         {"name": "uuid"},
         {"name": "first_name"},
@@ -13,7 +17,9 @@ class User(AbstractUser, SerializableMixin):
         {"name": "contractzones"},
     )
 
-    is_official = models.BooleanField(verbose_name=_("official"), default=False)
+    is_official = models.BooleanField(
+        verbose_name=_("official"), default=False, db_index=True
+    )
 
     @property
     def contractzones(self):
@@ -31,3 +37,39 @@ class User(AbstractUser, SerializableMixin):
 
 def can_view_contract_zone_details(user):
     return user.is_authenticated and user.is_official
+
+
+OFFICIAL_EMAILS_VERSION_KEY = "official_emails"
+OFFICIAL_EMAILS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_official_emails():
+    """
+    Return the email addresses of all officials
+
+    The cache key contains the version of the addresses from the database, which is
+    changed by invalidate_official_emails() when a user becomes or stops being an
+    official or an official's email changes.
+    """
+    version = get_cache_version(OFFICIAL_EMAILS_VERSION_KEY)
+    key = f"official_emails:{version}"
+
+    emails = cache.get(key)
+    if emails is None:
+        emails = list(
+            User.objects.filter(is_official=True)
+            .exclude(email="")
+            .values_list("email", flat=True)
+        )
+        cache.set(key, emails, OFFICIAL_EMAILS_CACHE_TIMEOUT)
+    return emails
+
+
+def invalidate_official_emails():
+    """
+    Invalidate the cached official email addresses
+
+    The version is changed in the current transaction, so every process stops using
+    the cached addresses when the change causing this is committed.
+    """
+    bump_cache_versions(OFFICIAL_EMAILS_VERSION_KEY)
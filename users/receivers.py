@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import User, invalidate_official_emails
+
+
+@receiver(post_save, sender=User, dispatch_uid="invalidate_official_emails_on_save")
+def invalidate_official_emails_on_save(sender, instance, created, **kwargs):
+    was_official = instance.get_loaded_value("is_official")
+    if created:
+        changed = instance.is_official
+    else:
+        changed = instance.is_official != was_official or (
+            instance.is_official
+            and instance.email != instance.get_loaded_value("email")
+        )
+    if changed:
+        invalidate_official_emails()
+
+
+@receiver(post_delete, sender=User, dispatch_uid="invalidate_official_emails_on_delete")
+def invalidate_official_emails_on_delete(sender, instance, **kwargs):
+    if instance.is_official or instance.get_loaded_value("is_official"):
+        invalidate_official_emails()
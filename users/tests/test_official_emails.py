@@ -0,0 +1,73 @@
+import pytest
+
+from common.models import CacheVersion
+from users.factories import UserFactory
+from users.models import OFFICIAL_EMAILS_VERSION_KEY, User, get_official_emails
+
+
+@pytest.fixture
+def officials():
+    return UserFactory.create_batch(2, is_official=True)
+
+
+def test_official_emails(officials, user):
+    assert sorted(get_official_emails()) == sorted(o.email for o in officials)
+
+
+def test_official_emails_are_cached(officials, django_assert_num_queries):
+    get_official_emails()
+
+    # only the version is fetched
+    with django_assert_num_queries(1):
+        get_official_emails()
+
+
+def test_official_emails_version_is_shared_through_the_database(officials):
+    get_official_emails()
+
+    # e.g. an official demoted in another process with its own cache
+    User.objects.filter(pk=officials[0].pk).update(is_official=False)
+    CacheVersion.objects.update_or_create(
+        key=OFFICIAL_EMAILS_VERSION_KEY, defaults={"version": "other process"}
+    )
+
+    assert get_official_emails() == [officials[1].email]
+
+
+def test_official_emails_cache_invalidated_on_official_changes(officials, user):
+    official = User.objects.get(pk=officials[0].pk)
+    user = User.objects.get(pk=user.pk)
+    get_official_emails()
+
+    user.is_official = True
+    user.save()
+    assert user.email in get_official_emails()
+
+    official.email = "new.email@example.com"
+    official.save()
+    assert "new.email@example.com" in get_official_emails()
+
+    official.is_official = False
+    official.save()
+    assert "new.email@example.com" not in get_official_emails()
+
+    user.delete()
+    assert get_official_emails() == [officials[1].email]
+
+    UserFactory(is_official=True, email="created@example.com")
+    assert "created@example.com" in get_official_emails()
+
+
+def test_official_emails_cache_not_invalidated_on_irrelevant_changes(
+    officials, user, django_assert_num_queries
+):
+    official = User.objects.get(pk=officials[0].pk)
+    get_official_emails()
+
+    official.first_name = "New name"
+    official.save()
+    user.email = "new.email@example.com"
+    user.save()
+
+    with django_assert_num_queries(1):
+        get_official_emails()